@@ -2,8 +2,6 @@
 
 import asyncio
 import logging
-import time
-from datetime import timedelta
 
 import voluptuous as vol
 from homeassistant.config_entries import (
@@ -11,34 +9,35 @@ from homeassistant.config_entries import (
     ConfigEntry,
 )
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import (
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
+from homeassistant.helpers.storage import Store
 
+from .cache import SunPowerSampleCache
 from .const import (
-    BATTERY_DEVICE_TYPE,
+    DEFAULT_SUNPOWER_CONNECT_TIMEOUT,
+    DEFAULT_SUNPOWER_MAX_STALENESS,
+    DEFAULT_SUNPOWER_MAX_UPDATE_INTERVAL,
+    DEFAULT_SUNPOWER_READ_TIMEOUT,
     DEFAULT_SUNPOWER_UPDATE_INTERVAL,
     DEFAULT_SUNVAULT_UPDATE_INTERVAL,
     DOMAIN,
-    ESS_DEVICE_TYPE,
-    HUBPLUS_DEVICE_TYPE,
-    INVERTER_DEVICE_TYPE,
-    METER_DEVICE_TYPE,
-    PVS_DEVICE_TYPE,
-    SETUP_TIMEOUT_MIN,
+    SETUP_RETRY_MAX_DELAY,
+    SETUP_RETRY_MIN_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+    SUNPOWER_ADAPTIVE_INTERVAL,
+    SUNPOWER_CACHE,
+    SUNPOWER_CONNECT_TIMEOUT,
     SUNPOWER_COORDINATOR,
+    SUNPOWER_DATA_READY,
     SUNPOWER_HOST,
+    SUNPOWER_MAX_STALENESS,
+    SUNPOWER_MAX_UPDATE_INTERVAL,
     SUNPOWER_OBJECT,
+    SUNPOWER_READ_TIMEOUT,
     SUNPOWER_UPDATE_INTERVAL,
-    SUNVAULT_DEVICE_TYPE,
     SUNVAULT_UPDATE_INTERVAL,
 )
-from .sunpower import (
-    ConnectionException,
-    ParseException,
-    SunPowerMonitor,
-)
+from .coordinator import SunPowerDataUpdateCoordinator
+from .sunpower import AsyncSunPowerMonitor
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -46,266 +45,10 @@ CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.Schema({})}, extra=vol.ALLOW_EXTRA)
 
 PLATFORMS = ["sensor", "binary_sensor"]
 
-PREVIOUS_PVS_SAMPLE_TIME = 0
-PREVIOUS_PVS_SAMPLE = {}
-PREVIOUS_ESS_SAMPLE_TIME = 0
-PREVIOUS_ESS_SAMPLE = {}
-
-
-def create_vmeter(data):
-    # Create a virtual 'METER' that uses the sum of inverters
-    kwh = 0.0
-    kw = 0.0
-    amps = 0.0
-    freq = []
-    volts = []
-    state = "working"
-    for _serial, inverter in data.get(INVERTER_DEVICE_TYPE, {}).items():
-        if "STATE" in inverter and inverter["STATE"] != "working":
-            state = inverter["STATE"]
-        kwh += float(inverter.get("ltea_3phsum_kwh", "0"))
-        kw += float(inverter.get("p_mppt1_kw", "0"))
-        amps += float(inverter.get("i_3phsum_a", "0"))
-        if "freq_hz" in inverter:
-            freq.append(float(inverter["freq_hz"]))
-        if "vln_3phavg_v" in inverter:
-            volts.append(float(inverter["vln_3phavg_v"]))
-
-    freq_avg = sum(freq) / len(freq)
-    volts_avg = sum(volts) / len(volts)
-
-    pvs_serial = next(iter(data[PVS_DEVICE_TYPE]))  # only one PVS
-    vmeter_serial = f"{pvs_serial}pv"
-    data.setdefault(METER_DEVICE_TYPE, {})[vmeter_serial] = {
-        "SERIAL": vmeter_serial,
-        "TYPE": "PVS-METER-P",
-        "STATE": state,
-        "MODEL": "Virtual",
-        "DESCR": f"Power Meter {vmeter_serial}",
-        "DEVICE_TYPE": "Power Meter",
-        "interface": "virtual",
-        "SWVER": "1.0",
-        "HWVER": "Virtual",
-        "origin": "virtual",
-        "net_ltea_3phsum_kwh": kwh,
-        "p_3phsum_kw": kw,
-        "freq_hz": freq_avg,
-        "i_a": amps,
-        "v12_v": volts_avg,
-    }
-    return data
-
-
-def convert_sunpower_data(sunpower_data):
-    """Convert PVS data into indexable format data[device_type][serial]"""
-    data = {}
-    for device in sunpower_data["devices"]:
-        data.setdefault(device["DEVICE_TYPE"], {})[device["SERIAL"]] = device
-
-    create_vmeter(data)
-
-    return data
-
-
-def convert_ess_data(ess_data, data):
-    """Do all the gymnastics to Integrate ESS data from its unique data source into the PVS data"""
-    sunvault_amperages = []
-    sunvault_voltages = []
-    sunvault_temperatures = []
-    sunvault_customer_state_of_charges = []
-    sunvault_system_state_of_charges = []
-    sunvault_power = []
-    sunvault_power_inputs = []
-    sunvault_power_outputs = []
-    sunvault_state = "working"
-    for device in ess_data["ess_report"]["battery_status"]:
-        data[BATTERY_DEVICE_TYPE][device["serial_number"]]["battery_amperage"] = device[
-            "battery_amperage"
-        ]["value"]
-        data[BATTERY_DEVICE_TYPE][device["serial_number"]]["battery_voltage"] = device[
-            "battery_voltage"
-        ]["value"]
-        data[BATTERY_DEVICE_TYPE][device["serial_number"]]["customer_state_of_charge"] = device[
-            "customer_state_of_charge"
-        ]["value"]
-        data[BATTERY_DEVICE_TYPE][device["serial_number"]]["system_state_of_charge"] = device[
-            "system_state_of_charge"
-        ]["value"]
-        data[BATTERY_DEVICE_TYPE][device["serial_number"]]["temperature"] = device["temperature"][
-            "value"
-        ]
-        if data[BATTERY_DEVICE_TYPE][device["serial_number"]]["STATE"] != "working":
-            sunvault_state = data[BATTERY_DEVICE_TYPE][device["serial_number"]]["STATE"]
-        sunvault_amperages.append(device["battery_amperage"]["value"])
-        sunvault_voltages.append(device["battery_voltage"]["value"])
-        sunvault_temperatures.append(device["temperature"]["value"])
-        sunvault_customer_state_of_charges.append(
-            device["customer_state_of_charge"]["value"],
-        )
-        sunvault_system_state_of_charges.append(device["system_state_of_charge"]["value"])
-        sunvault_power.append(sunvault_amperages[-1] * sunvault_voltages[-1])
-        if sunvault_amperages[-1] < 0:
-            sunvault_power_outputs.append(
-                abs(sunvault_amperages[-1] * sunvault_voltages[-1]),
-            )
-            sunvault_power_inputs.append(0)
-        elif sunvault_amperages[-1] > 0:
-            sunvault_power_inputs.append(sunvault_amperages[-1] * sunvault_voltages[-1])
-            sunvault_power_outputs.append(0)
-        else:
-            sunvault_power_inputs.append(0)
-            sunvault_power_outputs.append(0)
-    for device in ess_data["ess_report"]["ess_status"]:
-        data[ESS_DEVICE_TYPE][device["serial_number"]]["enclosure_humidity"] = device[
-            "enclosure_humidity"
-        ]["value"]
-        data[ESS_DEVICE_TYPE][device["serial_number"]]["enclosure_temperature"] = device[
-            "enclosure_temperature"
-        ]["value"]
-        data[ESS_DEVICE_TYPE][device["serial_number"]]["agg_power"] = device["ess_meter_reading"][
-            "agg_power"
-        ]["value"]
-        data[ESS_DEVICE_TYPE][device["serial_number"]]["meter_a_current"] = device[
-            "ess_meter_reading"
-        ]["meter_a"]["reading"]["current"]["value"]
-        data[ESS_DEVICE_TYPE][device["serial_number"]]["meter_a_power"] = device[
-            "ess_meter_reading"
-        ]["meter_a"]["reading"]["power"]["value"]
-        data[ESS_DEVICE_TYPE][device["serial_number"]]["meter_a_voltage"] = device[
-            "ess_meter_reading"
-        ]["meter_a"]["reading"]["voltage"]["value"]
-        data[ESS_DEVICE_TYPE][device["serial_number"]]["meter_b_current"] = device[
-            "ess_meter_reading"
-        ]["meter_b"]["reading"]["current"]["value"]
-        data[ESS_DEVICE_TYPE][device["serial_number"]]["meter_b_power"] = device[
-            "ess_meter_reading"
-        ]["meter_b"]["reading"]["power"]["value"]
-        data[ESS_DEVICE_TYPE][device["serial_number"]]["meter_b_voltage"] = device[
-            "ess_meter_reading"
-        ]["meter_b"]["reading"]["voltage"]["value"]
-    if True:
-        device = ess_data["ess_report"]["hub_plus_status"]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["contactor_position"] = device[
-            "contactor_position"
-        ]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["grid_frequency_state"] = device[
-            "grid_frequency_state"
-        ]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["grid_phase1_voltage"] = device[
-            "grid_phase1_voltage"
-        ]["value"]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["grid_phase2_voltage"] = device[
-            "grid_phase2_voltage"
-        ]["value"]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["grid_voltage_state"] = device[
-            "grid_voltage_state"
-        ]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["hub_humidity"] = device[
-            "hub_humidity"
-        ]["value"]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["hub_temperature"] = device[
-            "hub_temperature"
-        ]["value"]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["inverter_connection_voltage"] = device[
-            "inverter_connection_voltage"
-        ]["value"]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["load_frequency_state"] = device[
-            "load_frequency_state"
-        ]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["load_phase1_voltage"] = device[
-            "load_phase1_voltage"
-        ]["value"]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["load_phase2_voltage"] = device[
-            "load_phase2_voltage"
-        ]["value"]
-        data[HUBPLUS_DEVICE_TYPE][device["serial_number"]]["main_voltage"] = device[
-            "main_voltage"
-        ]["value"]
-    if True:
-        # Generate a usable serial number for this virtual device, use PVS serial as base
-        # since we must be talking through one and it has a serial
-        pvs_serial = next(iter(data[PVS_DEVICE_TYPE]))  # only one PVS
-        sunvault_serial = f"sunvault_{pvs_serial}"
-        data[SUNVAULT_DEVICE_TYPE] = {sunvault_serial: {}}
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["sunvault_amperage"] = sum(
-            sunvault_amperages,
-        )
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["sunvault_voltage"] = sum(
-            sunvault_voltages,
-        ) / len(sunvault_voltages)
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["sunvault_temperature"] = sum(
-            sunvault_temperatures,
-        ) / len(sunvault_temperatures)
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["sunvault_customer_state_of_charge"] = sum(
-            sunvault_customer_state_of_charges,
-        ) / len(sunvault_customer_state_of_charges)
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["sunvault_system_state_of_charge"] = sum(
-            sunvault_system_state_of_charges,
-        ) / len(sunvault_system_state_of_charges)
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["sunvault_power_input"] = sum(
-            sunvault_power_inputs,
-        )
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["sunvault_power_output"] = sum(
-            sunvault_power_outputs,
-        )
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["sunvault_power"] = sum(sunvault_power)
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["STATE"] = sunvault_state
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["SERIAL"] = sunvault_serial
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["SWVER"] = "1.0"
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["HWVER"] = "Virtual"
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["DESCR"] = "Virtual SunVault"
-        data[SUNVAULT_DEVICE_TYPE][sunvault_serial]["MODEL"] = "Virtual SunVault"
-    return data
-
-
-def sunpower_fetch(
-    sunpower_monitor,
-    sunpower_update_invertal,
-    sunvault_update_invertal,
-):
-    """Basic data fetch routine to get and reformat sunpower data to a dict of device
-    type and serial #"""
-    global PREVIOUS_PVS_SAMPLE_TIME
-    global PREVIOUS_PVS_SAMPLE
-    global PREVIOUS_ESS_SAMPLE_TIME
-    global PREVIOUS_ESS_SAMPLE
-
-    sunpower_data = PREVIOUS_PVS_SAMPLE
-    ess_data = PREVIOUS_ESS_SAMPLE
-    use_ess = False
-    data = None
-
-    try:
-        if (time.time() - PREVIOUS_PVS_SAMPLE_TIME) >= (sunpower_update_invertal - 1):
-            PREVIOUS_PVS_SAMPLE_TIME = time.time()
-            sunpower_data = sunpower_monitor.device_list()
-            PREVIOUS_PVS_SAMPLE = sunpower_data
-            _LOGGER.debug("got PVS data %s", sunpower_data)
-    except (ParseException, ConnectionException) as error:
-        raise UpdateFailed from error
-
-    data = convert_sunpower_data(sunpower_data)
-    if ESS_DEVICE_TYPE in data:  # Look for an ESS in PVS data
-        use_ess = True
-
-    try:
-        if use_ess and (time.time() - PREVIOUS_ESS_SAMPLE_TIME) >= (sunvault_update_invertal - 1):
-            PREVIOUS_ESS_SAMPLE_TIME = time.time()
-            ess_data = sunpower_monitor.energy_storage_system_status()
-            PREVIOUS_ESS_SAMPLE = ess_data
-            _LOGGER.debug("got ESS data %s", ess_data)
-    except (ParseException, ConnectionException) as error:
-        raise UpdateFailed from error
-
-    try:
-        if use_ess:
-            convert_ess_data(
-                ess_data,
-                data,
-            )  # ess converter appends to items in existing PVS structure
-        return data
-    except ParseException as error:
-        raise UpdateFailed from error
+
+def snapshot_storage_key(entry_id):
+    """Storage key of the persisted data snapshot of a config entry"""
+    return f"{DOMAIN}.{entry_id}"
 
 
 async def async_setup(hass: HomeAssistant, config: dict):
@@ -332,7 +75,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     entry_id = entry.entry_id
 
     hass.data[DOMAIN].setdefault(entry_id, {})
-    sunpower_monitor = SunPowerMonitor(entry.data[SUNPOWER_HOST])
+    sunpower_monitor = AsyncSunPowerMonitor(
+        entry.data[SUNPOWER_HOST],
+        connect_timeout=entry.options.get(
+            SUNPOWER_CONNECT_TIMEOUT,
+            DEFAULT_SUNPOWER_CONNECT_TIMEOUT,
+        ),
+        read_timeout=entry.options.get(SUNPOWER_READ_TIMEOUT, DEFAULT_SUNPOWER_READ_TIMEOUT),
+    )
+    sample_cache = SunPowerSampleCache()
     sunpower_update_invertal = entry.options.get(
         SUNPOWER_UPDATE_INTERVAL,
         DEFAULT_SUNPOWER_UPDATE_INTERVAL,
@@ -342,61 +93,69 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         DEFAULT_SUNVAULT_UPDATE_INTERVAL,
     )
 
-    async def async_update_data():
-        """Fetch data from API endpoint, used by coordinator to get mass data updates"""
-        _LOGGER.debug("Updating SunPower data")
-        return await hass.async_add_executor_job(
-            sunpower_fetch,
-            sunpower_monitor,
-            sunpower_update_invertal,
-            sunvault_update_invertal,
+    adaptive_max_interval = None
+    if entry.options.get(SUNPOWER_ADAPTIVE_INTERVAL, False):
+        adaptive_max_interval = entry.options.get(
+            SUNPOWER_MAX_UPDATE_INTERVAL,
+            DEFAULT_SUNPOWER_MAX_UPDATE_INTERVAL,
         )
 
-    # This could be better, taking the shortest time interval as the coordinator update is fine
-    # if the long interval is an even multiple of the short or *much* smaller
-    coordinator_interval = (
-        sunvault_update_invertal
-        if sunvault_update_invertal < sunpower_update_invertal
-        else sunpower_update_invertal
-    )
-
     _LOGGER.debug(
-        f"Intervals: Sunpower {sunpower_update_invertal} Sunvault {sunvault_update_invertal}",
+        f"Intervals: Sunpower {sunpower_update_invertal} Sunvault {sunvault_update_invertal}"
+        f" Adaptive max {adaptive_max_interval}",
     )
-    _LOGGER.debug(f"Coordinator update interval set to {coordinator_interval}")
 
-    coordinator = DataUpdateCoordinator(
+    coordinator = SunPowerDataUpdateCoordinator(
         hass,
-        _LOGGER,
-        name="SunPower PVS",
-        update_method=async_update_data,
-        update_interval=timedelta(seconds=coordinator_interval),
+        sunpower_monitor,
+        sample_cache,
+        sunpower_update_invertal,
+        sunvault_update_invertal,
+        adaptive_max_interval,
+        Store(hass, SNAPSHOT_STORAGE_VERSION, snapshot_storage_key(entry_id)),
+        entry.options.get(SUNPOWER_MAX_STALENESS, DEFAULT_SUNPOWER_MAX_STALENESS),
     )
+    await coordinator.async_restore_snapshot()
 
     hass.data[DOMAIN][entry.entry_id] = {
         SUNPOWER_OBJECT: sunpower_monitor,
+        SUNPOWER_CACHE: sample_cache,
         SUNPOWER_COORDINATOR: coordinator,
+        SUNPOWER_DATA_READY: [],
     }
 
-    start = time.time()
-    # Need to make sure this data loads on setup, be aggressive about retries
-    while not coordinator.data:
-        _LOGGER.debug("Config Update Attempt")
-        await coordinator.async_refresh()
-        if (time.time() - start) > (SETUP_TIMEOUT_MIN * 60):
-            _LOGGER.error("Failed to update data")
-            break
-
-    for component in PLATFORMS:
-        hass.async_create_task(
-            hass.config_entries.async_forward_entry_setup(entry, component),
-        )
+    # Platforms add their entities once data shows up, so the PVS never holds up startup
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_create_background_task(
+        hass,
+        async_first_refresh(hass.data[DOMAIN][entry_id]),
+        f"{DOMAIN} first refresh {entry.title}",
+    )
 
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
     return True
 
 
+async def async_first_refresh(sunpower_state):
+    """Keep trying to get the first data from the PVS backing off exponentially, then hand
+    it to the platforms waiting for it"""
+    coordinator = sunpower_state[SUNPOWER_COORDINATOR]
+    delay = SETUP_RETRY_MIN_DELAY
+    while True:
+        _LOGGER.debug("Config Update Attempt")
+        await coordinator.async_refresh()
+        if coordinator.data:
+            break
+        _LOGGER.warning("Failed to get data from the PVS, retrying in %s seconds", delay)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, SETUP_RETRY_MAX_DELAY)
+
+    data_ready_callbacks = sunpower_state[SUNPOWER_DATA_READY]
+    while data_ready_callbacks:
+        data_ready_callbacks.pop(0)()
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Update listener."""
     _LOGGER.debug(
@@ -421,6 +180,15 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         ),
     )
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        sunpower_state = hass.data[DOMAIN].pop(entry.entry_id)
+        sunpower_monitor = sunpower_state[SUNPOWER_OBJECT]
+        _LOGGER.debug("PVS connection stats: %s", sunpower_monitor.connection_stats)
+        await sunpower_monitor.close()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted snapshot along with the config entry."""
+    store = Store(hass, SNAPSHOT_STORAGE_VERSION, snapshot_storage_key(entry.entry_id))
+    await store.async_remove()
@@ -0,0 +1,69 @@
+"""Batched sums and averages of numeric fields over many device records."""
+
+from itertools import repeat
+from math import fsum
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:  # numpy ships with Home Assistant, but the integration works without it
+    np = None
+
+
+def load_rows(records, fields):
+    """(value, ...) of fields for every record in a list, None where a record lacks a field"""
+    if len(fields) == 1:
+        return [(record.get(fields[0]),) for record in records]
+    getter = itemgetter(*fields)
+    try:
+        return list(map(getter, records))
+    except KeyError:
+        return [tuple(map(record.get, fields)) for record in records]
+
+
+def _sum_present(values):
+    """(sum, count) of values, leaving out the None ones"""
+    try:
+        return fsum(values), len(values)
+    except TypeError:  # only look for None when there is some, comparing is slow
+        present = [value for value in values if value is not None]
+        return fsum(present), len(present)
+
+
+def _reduce_numpy(rows, width):
+    """Sums and counts per column, None is loaded as NaN and not counted"""
+    matrix = np.array(rows, dtype=np.float64).reshape(len(rows), width)
+    present = ~np.isnan(matrix)
+    return np.nansum(matrix, axis=0).tolist(), np.count_nonzero(present, axis=0).tolist()
+
+
+def _reduce_python(rows, width):
+    """Sums and counts per column, None is left out"""
+    reduced = [_sum_present(values) for values in zip(*rows)] or [(0.0, 0)] * width
+    return [total for total, _count in reduced], [count for _total, count in reduced]
+
+
+def aggregate(records, sums=(), means=()):
+    """Sum the fields in sums and average the fields in means over records
+    Returns {field: value}, sums of nothing are 0.0 and averages of nothing None"""
+    fields = (*sums, *means)
+    if not fields:
+        return {}
+    rows = load_rows(records, fields)
+    reduce = _reduce_numpy if np is not None else _reduce_python
+    totals, counts = reduce(rows, len(fields))
+    result = {field: float(total) for field, total in zip(sums, totals)}
+    first_mean = len(sums)
+    for field, total, count in zip(means, totals[first_mean:], counts[first_mean:]):
+        result[field] = total / count if count else None
+    return result
+
+
+def fleet_state(records, default="working"):
+    """STATE of the last record that isn't working, default when all are"""
+    states = [
+        state
+        for state in map(dict.get, records, repeat("STATE"), repeat(default))
+        if state != default
+    ]
+    return states[-1] if states else default
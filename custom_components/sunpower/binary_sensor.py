@@ -1,160 +1,117 @@
 """Support for Sunpower binary sensors."""
 
 import logging
+from dataclasses import dataclass
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.core import callback
 
 from .const import (
     DOMAIN,
-    ESS_DEVICE_TYPE,
-    PVS_DEVICE_TYPE,
     SUNPOWER_BINARY_SENSORS,
     SUNPOWER_COORDINATOR,
-    SUNPOWER_DESCRIPTIVE_NAMES,
-    SUNPOWER_PRODUCT_NAMES,
     SUNVAULT_BINARY_SENSORS,
 )
-from .entity import SunPowerEntity
+from .entity import (
+    SunPowerEntity,
+    SunPowerEntityDescription,
+    async_add_data_entities,
+    async_when_data_ready,
+    compile_descriptions,
+    entity_targets,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
-    """Set up the Sunpower sensors."""
+    """Set up the Sunpower binary sensors."""
     sunpower_state = hass.data[DOMAIN][config_entry.entry_id]
     _LOGGER.debug("Sunpower_state: %s", sunpower_state)
+    coordinator = sunpower_state[SUNPOWER_COORDINATOR]
 
-    do_descriptive_names = False
-    if SUNPOWER_DESCRIPTIVE_NAMES in config_entry.data:
-        do_descriptive_names = config_entry.data[SUNPOWER_DESCRIPTIVE_NAMES]
+    @callback
+    def async_add_sunpower_entities():
+        async_add_data_entities(
+            config_entry,
+            coordinator,
+            create_binary_sensors,
+            async_add_entities,
+        )
 
-    do_product_names = False
-    if SUNPOWER_PRODUCT_NAMES in config_entry.data:
-        do_product_names = config_entry.data[SUNPOWER_PRODUCT_NAMES]
+    async_when_data_ready(sunpower_state, coordinator, async_add_sunpower_entities)
 
-    coordinator = sunpower_state[SUNPOWER_COORDINATOR]
-    sunpower_data = coordinator.data
-
-    do_ess = False
-    if ESS_DEVICE_TYPE in sunpower_data:
-        do_ess = True
-    else:
-        _LOGGER.debug("Found No ESS Data")
-
-    if PVS_DEVICE_TYPE not in sunpower_data:
-        _LOGGER.error("Cannot find PVS Entry")
-    else:
-        entities = []
-
-        pvs = next(iter(sunpower_data[PVS_DEVICE_TYPE].values()))
-
-        BINARY_SENSORS = SUNPOWER_BINARY_SENSORS
-        if do_ess:
-            BINARY_SENSORS.update(SUNVAULT_BINARY_SENSORS)
-
-        for device_type in BINARY_SENSORS:
-            if device_type not in sunpower_data:
-                _LOGGER.error(f"Cannot find any {device_type}")
-                continue
-            unique_id = BINARY_SENSORS[device_type]["unique_id"]
-            sensors = BINARY_SENSORS[device_type]["sensors"]
-            for index, sensor_data in enumerate(sunpower_data[device_type].values()):
-                for sensor_name in sensors:
-                    sensor = sensors[sensor_name]
-                    sensor_type = (
-                        "" if not do_descriptive_names else f"{sensor_data.get('TYPE', '')} "
-                    )
-                    sensor_description = (
-                        "" if not do_descriptive_names else f"{sensor_data.get('DESCR', '')} "
-                    )
-                    text_sunpower = "" if not do_product_names else "SunPower "
-                    text_sunvault = "" if not do_product_names else "SunVault "
-                    text_pvs = "" if not do_product_names else "PVS "
-                    sensor_index = "" if not do_descriptive_names else f"{index + 1} "
-                    sunpower_sensor = SunPowerState(
-                        coordinator=coordinator,
-                        my_info=sensor_data,
-                        parent_info=pvs if device_type != PVS_DEVICE_TYPE else None,
-                        id_code=unique_id,
-                        device_type=device_type,
-                        field=sensor["field"],
-                        title=sensor["title"].format(
-                            index=sensor_index,
-                            TYPE=sensor_type,
-                            DESCR=sensor_description,
-                            SUN_POWER=text_sunpower,
-                            SUN_VAULT=text_sunvault,
-                            PVS=text_pvs,
-                            SERIAL=sensor_data.get("SERIAL", "Unknown"),
-                            MODEL=sensor_data.get("MODEL", "Unknown"),
-                        ),
-                        device_class=sensor["device"],
-                        on_value=sensor["on_value"],
-                        entity_category=sensor.get("entity_category", None),
-                    )
-                    entities.append(sunpower_sensor)
-
-    async_add_entities(entities, True)
 
+@dataclass(frozen=True, slots=True)
+class SunPowerBinarySensorDescription(SunPowerEntityDescription):
+    """A binary sensor table entry, on while the field equals on_value.
+    A live field is kept up to date by the integration itself, also while the PVS fails"""
 
-class SunPowerState(SunPowerEntity, BinarySensorEntity):
-    """Representation of SunPower Meter Working State"""
+    device_class: str | None = None
+    on_value: str | None = None
+    live: bool = False
 
-    def __init__(
-        self,
-        coordinator,
-        my_info,
-        parent_info,
-        id_code,
-        device_type,
-        field,
-        title,
-        device_class,
-        on_value,
-        entity_category,
-    ):
-        super().__init__(coordinator, my_info, parent_info)
-        self._id_code = id_code
-        self._device_type = device_type
-        self._title = title
-        self._field = field
-        self._my_device_class = device_class
-        self._on_value = on_value
-        self._entity_category = entity_category
 
-    @property
-    def name(self):
-        """Device Name."""
-        return self._title
+def describe_binary_sensor(key, device_type, id_code, sensor):
+    return SunPowerBinarySensorDescription(
+        key=key,
+        device_type=device_type,
+        id_code=id_code,
+        field=sensor["field"],
+        title=sensor["title"],
+        entity_category=sensor.get("entity_category", None),
+        device_class=sensor["device"],
+        on_value=sensor["on_value"],
+        live=sensor.get("live", False),
+    )
+
+
+BINARY_SENSOR_DESCRIPTIONS = compile_descriptions(
+    SUNPOWER_BINARY_SENSORS,
+    describe_binary_sensor,
+)
+SUNVAULT_BINARY_SENSOR_DESCRIPTIONS = compile_descriptions(
+    SUNVAULT_BINARY_SENSORS,
+    describe_binary_sensor,
+)
+
+
+def create_binary_sensors(config_entry, coordinator):
+    """Create the binary sensors for the devices in the coordinator data"""
+    return [
+        SunPowerState(coordinator, description, device, device_info, title)
+        for description, device, device_info, title in entity_targets(
+            config_entry,
+            coordinator,
+            BINARY_SENSOR_DESCRIPTIONS,
+            SUNVAULT_BINARY_SENSOR_DESCRIPTIONS,
+        )
+    ]
+
+
+class SunPowerState(SunPowerEntity, BinarySensorEntity):
+    """Representation of SunPower Meter Working State"""
 
     @property
     def device_class(self):
         """Device Class."""
-        return self._my_device_class
+        return self._description.device_class
 
     @property
-    def entity_category(self):
-        return self._entity_category
+    def available(self):
+        """A live field stays available while the PVS fails, it is what tells about it"""
+        if self._description.live:
+            return self._record is not None
+        return super().available
 
-    @property
-    def unique_id(self):
-        """Device Uniqueid.
-        https://developers.home-assistant.io/docs/entity_registry_index/#unique-id
-        Should not include the domain, home assistant does that for us
-        base_unique_id is the serial number of the device (Inverter, PVS, Meter etc)
-        "_pvs_" just as a divider - in case we start pulling data from some other source
-        _field is the field within the data that this came from which is a dict so there
-        is only one.
-        Updating this format is a breaking change and should be called out if changed in a PR
-        """
-        return f"{self.base_unique_id}_pvs_{self._field}"
+    def _stale(self):
+        return not self._description.live and super()._stale()
+
+    def _bind_value(self, record):
+        self._state = None if record is None else record.get(self._field)
+        self._attr_is_on = self._state == self._description.on_value
 
     @property
     def state(self):
         """Get the current value"""
-        return self.coordinator.data[self._device_type][self.base_unique_id][self._field]
-
-    @property
-    def is_on(self):
-        """Return true if the binary sensor is on."""
-        return self.state == self._on_value
+        return self._state
@@ -0,0 +1,48 @@
+"""Circuit breaker keeping requests off an unresponsive PVS."""
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class SunPowerCircuitBreaker:
+    """Stop sending requests to a PVS that keeps failing.
+    After failure_threshold failed requests in a row the breaker opens and requests fail at
+    once for cooldown seconds.  Then a single probe may go out (half open), its success
+    closes the breaker and its failure opens it for another cooldown"""
+
+    def __init__(self, failure_threshold, cooldown):
+        """Initialize."""
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = None
+
+    def try_probe(self, now):
+        """If a probe may go out now, the breaker is half open until it is reported"""
+        if self.state != BREAKER_OPEN or now - self._opened_at < self.cooldown:
+            return False
+        self.state = BREAKER_HALF_OPEN
+        return True
+
+    def success(self):
+        """Record a request the PVS answered"""
+        self.failures = 0
+        self.state = BREAKER_CLOSED
+
+    def failure(self, now):
+        """Record a failed request, opening the breaker on too many or a failed probe"""
+        self.failures += 1
+        if self.state == BREAKER_HALF_OPEN or (
+            self.state == BREAKER_CLOSED and self.failures >= self.failure_threshold
+        ):
+            self.state = BREAKER_OPEN
+            self.opened += 1
+            self._opened_at = now
+
+    @property
+    def stats(self):
+        """State, failures in a row and how often the breaker opened"""
+        return {"state": self.state, "failures": self.failures, "opened": self.opened}
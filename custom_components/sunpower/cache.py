@@ -0,0 +1,68 @@
+"""Per config entry cache of the raw samples polled from the PVS."""
+
+import threading
+
+from .const import ESS_DEVICE_TYPE
+
+
+class SunPowerSampleCache:
+    """Last raw payload and fetch time for each PVS endpoint of one config entry.
+    Every PVS gets its own cache so several entries never serve or throttle each other's
+    data, a lock keeps it consistent if it is touched from more than one thread"""
+
+    def __init__(self):
+        """Initialize."""
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._fetch_times = {}
+        self._fetch_durations = {}
+        self._has_ess = False
+        self.hits = 0
+        self.misses = 0
+
+    def begin_fetch(self, endpoint, now):
+        """Record that endpoint is being fetched from the PVS"""
+        with self._lock:
+            self._fetch_times[endpoint] = now
+            self.misses += 1
+
+    def reuse(self, endpoint):
+        """Last sample for endpoint, served instead of asking the PVS"""
+        with self._lock:
+            self.hits += 1
+            return self._samples.get(endpoint, {})
+
+    def store(self, endpoint, sample, now, started=None):
+        """Save a freshly fetched sample for endpoint, its fetch took from started (when the
+        request was sent before begin_fetch) or from begin_fetch until now"""
+        with self._lock:
+            self._samples[endpoint] = sample
+            if started is None:
+                started = self._fetch_times.get(endpoint, now)
+            self._fetch_durations[endpoint] = now - started
+            if "devices" in sample:
+                self._has_ess = any(
+                    device.get("DEVICE_TYPE") == ESS_DEVICE_TYPE for device in sample["devices"]
+                )
+
+    def sample(self, endpoint):
+        """Last sample stored for endpoint"""
+        with self._lock:
+            return self._samples.get(endpoint, {})
+
+    def fetch_duration(self, endpoint):
+        """How long the last successful fetch of endpoint took"""
+        with self._lock:
+            return self._fetch_durations.get(endpoint)
+
+    @property
+    def has_ess(self):
+        """If the last DeviceList announced an ESS"""
+        with self._lock:
+            return self._has_ess
+
+    @property
+    def stats(self):
+        """Polls served from the cache versus polls that had to go to the PVS"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
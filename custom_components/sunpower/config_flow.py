@@ -9,22 +9,36 @@ from homeassistant import (
     exceptions,
 )
 from homeassistant.const import CONF_HOST
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
+    DEFAULT_SUNPOWER_CONNECT_TIMEOUT,
+    DEFAULT_SUNPOWER_MAX_STALENESS,
+    DEFAULT_SUNPOWER_MAX_UPDATE_INTERVAL,
+    DEFAULT_SUNPOWER_MIN_WRITE_INTERVAL,
+    DEFAULT_SUNPOWER_READ_TIMEOUT,
     DEFAULT_SUNPOWER_UPDATE_INTERVAL,
     DEFAULT_SUNVAULT_UPDATE_INTERVAL,
     DOMAIN,
     MIN_SUNPOWER_UPDATE_INTERVAL,
     MIN_SUNVAULT_UPDATE_INTERVAL,
+    SUNPOWER_ADAPTIVE_INTERVAL,
+    SUNPOWER_CONNECT_TIMEOUT,
     SUNPOWER_DESCRIPTIVE_NAMES,
     SUNPOWER_HOST,
+    SUNPOWER_MAX_STALENESS,
+    SUNPOWER_MAX_UPDATE_INTERVAL,
+    SUNPOWER_MIN_WRITE_INTERVAL,
+    SUNPOWER_OBJECT,
     SUNPOWER_PRODUCT_NAMES,
+    SUNPOWER_READ_TIMEOUT,
+    SUNPOWER_THROTTLE_WRITES,
     SUNPOWER_UPDATE_INTERVAL,
     SUNVAULT_UPDATE_INTERVAL,
 )
 from .sunpower import (
+    AsyncSunPowerMonitor,
     ConnectionException,
-    SunPowerMonitor,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -38,16 +52,27 @@ DATA_SCHEMA = vol.Schema(
 )
 
 
+def loaded_monitor(hass: core.HomeAssistant, host):
+    """Monitor of a loaded entry for host, so the flow shares its requests to the PVS"""
+    for sunpower_state in hass.data.get(DOMAIN, {}).values():
+        monitor = sunpower_state.get(SUNPOWER_OBJECT)
+        if monitor is not None and monitor.host == host:
+            return monitor
+    return None
+
+
 async def validate_input(hass: core.HomeAssistant, data):
     """Validate the user input allows us to connect.
 
     Data has the keys from DATA_SCHEMA with values provided by the user.
     """
 
-    spm = SunPowerMonitor(data[SUNPOWER_HOST])
+    spm = loaded_monitor(hass, data[SUNPOWER_HOST])
+    if spm is None:
+        spm = AsyncSunPowerMonitor(data[SUNPOWER_HOST], async_get_clientsession(hass))
     name = "PVS {}".format(data[SUNPOWER_HOST])
     try:
-        response = await hass.async_add_executor_job(spm.network_status)
+        response = await spm.network_status()
         _LOGGER.debug("Got from %s %s", data[SUNPOWER_HOST], response)
     except ConnectionException as error:
         raise CannotConnect from error
@@ -117,6 +142,18 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 errors[SUNPOWER_UPDATE_INTERVAL] = "MIN_INTERVAL"
             if user_input[SUNVAULT_UPDATE_INTERVAL] < MIN_SUNVAULT_UPDATE_INTERVAL:
                 errors[SUNPOWER_UPDATE_INTERVAL] = "MIN_INTERVAL"
+            # The max only bounds adaptive polling, it is not used without it
+            if user_input[SUNPOWER_ADAPTIVE_INTERVAL]:
+                if user_input[SUNPOWER_MAX_UPDATE_INTERVAL] < user_input[SUNPOWER_UPDATE_INTERVAL]:
+                    errors[SUNPOWER_MAX_UPDATE_INTERVAL] = "MAX_INTERVAL"
+            if user_input[SUNPOWER_MIN_WRITE_INTERVAL] < 0:
+                errors[SUNPOWER_MIN_WRITE_INTERVAL] = "MIN_INTERVAL"
+            if user_input[SUNPOWER_MAX_STALENESS] < 0:
+                errors[SUNPOWER_MAX_STALENESS] = "MIN_INTERVAL"
+            if user_input[SUNPOWER_CONNECT_TIMEOUT] < 1:
+                errors[SUNPOWER_CONNECT_TIMEOUT] = "MIN_INTERVAL"
+            if user_input[SUNPOWER_READ_TIMEOUT] < 1:
+                errors[SUNPOWER_READ_TIMEOUT] = "MIN_INTERVAL"
             if len(errors) == 0:
                 options[SUNPOWER_UPDATE_INTERVAL] = user_input[SUNPOWER_UPDATE_INTERVAL]
                 options[SUNVAULT_UPDATE_INTERVAL] = user_input[SUNVAULT_UPDATE_INTERVAL]
@@ -130,6 +167,25 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             SUNVAULT_UPDATE_INTERVAL,
             DEFAULT_SUNVAULT_UPDATE_INTERVAL,
         )
+        current_adaptive_interval = options.get(SUNPOWER_ADAPTIVE_INTERVAL, False)
+        current_max_interval = options.get(
+            SUNPOWER_MAX_UPDATE_INTERVAL,
+            DEFAULT_SUNPOWER_MAX_UPDATE_INTERVAL,
+        )
+        current_throttle_writes = options.get(SUNPOWER_THROTTLE_WRITES, True)
+        current_min_write_interval = options.get(
+            SUNPOWER_MIN_WRITE_INTERVAL,
+            DEFAULT_SUNPOWER_MIN_WRITE_INTERVAL,
+        )
+        current_max_staleness = options.get(
+            SUNPOWER_MAX_STALENESS,
+            DEFAULT_SUNPOWER_MAX_STALENESS,
+        )
+        current_connect_timeout = options.get(
+            SUNPOWER_CONNECT_TIMEOUT,
+            DEFAULT_SUNPOWER_CONNECT_TIMEOUT,
+        )
+        current_read_timeout = options.get(SUNPOWER_READ_TIMEOUT, DEFAULT_SUNPOWER_READ_TIMEOUT)
 
         return self.async_show_form(
             step_id="init",
@@ -137,6 +193,19 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 {
                     vol.Required(SUNPOWER_UPDATE_INTERVAL, default=current_sunpower_interval): int,
                     vol.Required(SUNVAULT_UPDATE_INTERVAL, default=current_sunvault_interval): int,
+                    vol.Required(
+                        SUNPOWER_ADAPTIVE_INTERVAL,
+                        default=current_adaptive_interval,
+                    ): bool,
+                    vol.Required(SUNPOWER_MAX_UPDATE_INTERVAL, default=current_max_interval): int,
+                    vol.Required(SUNPOWER_THROTTLE_WRITES, default=current_throttle_writes): bool,
+                    vol.Required(
+                        SUNPOWER_MIN_WRITE_INTERVAL,
+                        default=current_min_write_interval,
+                    ): int,
+                    vol.Required(SUNPOWER_MAX_STALENESS, default=current_max_staleness): int,
+                    vol.Required(SUNPOWER_CONNECT_TIMEOUT, default=current_connect_timeout): int,
+                    vol.Required(SUNPOWER_READ_TIMEOUT, default=current_read_timeout): int,
                 },
             ),
             errors=errors,
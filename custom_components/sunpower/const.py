@@ -1,5 +1,6 @@
 """Constants for the sunpower integration."""
 
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorStateClass,
@@ -19,6 +20,8 @@ from homeassistant.const import (
     UnitOfTime,
 )
 
+from .breaker import BREAKER_OPEN
+
 DOMAIN = "sunpower"
 
 SUNPOWER_DESCRIPTIVE_NAMES = "use_descriptive_names"
@@ -26,13 +29,36 @@ SUNPOWER_PRODUCT_NAMES = "use_product_names"
 SUNPOWER_OBJECT = "sunpower"
 SUNPOWER_HOST = "host"
 SUNPOWER_COORDINATOR = "coordinator"
+SUNPOWER_CACHE = "cache"
+SUNPOWER_DATA_READY = "data_ready_callbacks"
 DEFAULT_SUNPOWER_UPDATE_INTERVAL = 120
 DEFAULT_SUNVAULT_UPDATE_INTERVAL = 60
 MIN_SUNPOWER_UPDATE_INTERVAL = 60
 MIN_SUNVAULT_UPDATE_INTERVAL = 20
 SUNPOWER_UPDATE_INTERVAL = "PVS_UPDATE_INTERVAL"
 SUNVAULT_UPDATE_INTERVAL = "ESS_UPDATE_INTERVAL"
-SETUP_TIMEOUT_MIN = 5
+SUNPOWER_ADAPTIVE_INTERVAL = "PVS_ADAPTIVE_INTERVAL"
+SUNPOWER_MAX_UPDATE_INTERVAL = "PVS_MAX_UPDATE_INTERVAL"
+DEFAULT_SUNPOWER_MAX_UPDATE_INTERVAL = 600
+SUNPOWER_THROTTLE_WRITES = "PVS_THROTTLE_WRITES"
+SUNPOWER_MIN_WRITE_INTERVAL = "PVS_MIN_WRITE_INTERVAL"
+# 0 keeps the min_interval of each sensor
+DEFAULT_SUNPOWER_MIN_WRITE_INTERVAL = 0
+SUNPOWER_MAX_STALENESS = "PVS_MAX_STALENESS"
+# Keep serving the last data through failed polls for this long, 0 to go unavailable at once
+DEFAULT_SUNPOWER_MAX_STALENESS = 600
+SUNPOWER_CONNECT_TIMEOUT = "PVS_CONNECT_TIMEOUT"
+DEFAULT_SUNPOWER_CONNECT_TIMEOUT = 10
+SUNPOWER_READ_TIMEOUT = "PVS_READ_TIMEOUT"
+DEFAULT_SUNPOWER_READ_TIMEOUT = 120
+SETUP_RETRY_MIN_DELAY = 5
+SNAPSHOT_STORAGE_VERSION = 1
+# Batch snapshot writes, the DeviceList of a big site is a lot to write every poll
+SNAPSHOT_SAVE_DELAY = 300
+SETUP_RETRY_MAX_DELAY = 300
+
+PVS_ENDPOINT = "device_list"
+ESS_ENDPOINT = "ess_status"
 
 PVS_DEVICE_TYPE = "PVS"
 INVERTER_DEVICE_TYPE = "Inverter"
@@ -42,6 +68,61 @@ ESS_DEVICE_TYPE = "Energy Storage System"
 HUBPLUS_DEVICE_TYPE = "HUB+"
 SUNVAULT_DEVICE_TYPE = "SunVault"
 
+# Device types whose data (partly) comes from the ESS status endpoint
+ESS_DEVICE_TYPES = (
+    BATTERY_DEVICE_TYPE,
+    ESS_DEVICE_TYPE,
+    HUBPLUS_DEVICE_TYPE,
+    SUNVAULT_DEVICE_TYPE,
+)
+
+# Where the ESS fields come from in the energy-storage-system/status report, per section
+# of the report the device type of its devices and {field: path of keys into a device}.
+# hub_plus_status holds a single device, the other sections a list of them
+ESS_FIELD_PATHS = {
+    "battery_status": (
+        BATTERY_DEVICE_TYPE,
+        {
+            "battery_amperage": ("battery_amperage", "value"),
+            "battery_voltage": ("battery_voltage", "value"),
+            "customer_state_of_charge": ("customer_state_of_charge", "value"),
+            "system_state_of_charge": ("system_state_of_charge", "value"),
+            "temperature": ("temperature", "value"),
+        },
+    ),
+    "ess_status": (
+        ESS_DEVICE_TYPE,
+        {
+            "enclosure_humidity": ("enclosure_humidity", "value"),
+            "enclosure_temperature": ("enclosure_temperature", "value"),
+            "agg_power": ("ess_meter_reading", "agg_power", "value"),
+            "meter_a_current": ("ess_meter_reading", "meter_a", "reading", "current", "value"),
+            "meter_a_power": ("ess_meter_reading", "meter_a", "reading", "power", "value"),
+            "meter_a_voltage": ("ess_meter_reading", "meter_a", "reading", "voltage", "value"),
+            "meter_b_current": ("ess_meter_reading", "meter_b", "reading", "current", "value"),
+            "meter_b_power": ("ess_meter_reading", "meter_b", "reading", "power", "value"),
+            "meter_b_voltage": ("ess_meter_reading", "meter_b", "reading", "voltage", "value"),
+        },
+    ),
+    "hub_plus_status": (
+        HUBPLUS_DEVICE_TYPE,
+        {
+            "contactor_position": ("contactor_position",),
+            "grid_frequency_state": ("grid_frequency_state",),
+            "grid_phase1_voltage": ("grid_phase1_voltage", "value"),
+            "grid_phase2_voltage": ("grid_phase2_voltage", "value"),
+            "grid_voltage_state": ("grid_voltage_state",),
+            "hub_humidity": ("hub_humidity", "value"),
+            "hub_temperature": ("hub_temperature", "value"),
+            "inverter_connection_voltage": ("inverter_connection_voltage", "value"),
+            "load_frequency_state": ("load_frequency_state",),
+            "load_phase1_voltage": ("load_phase1_voltage", "value"),
+            "load_phase2_voltage": ("load_phase2_voltage", "value"),
+            "main_voltage": ("main_voltage", "value"),
+        },
+    ),
+}
+
 WORKING_STATE = "working"
 
 # SUNPOWER_DESCRIPTIVE_NAMES will take advantage of the following:
@@ -53,6 +134,12 @@ WORKING_STATE = "working"
 # - {SUN_VAULT} is replaced with "SunVault "
 # - {SERIAL} is replaced with the raw device serial # (no spaces)
 # - {MODEL} is replaced with the raw device MODEL (no spaces)
+# Sensors with "enabled": False are created disabled, for detail few people need
+#
+# Noisy sensors can hold back state writes to spare the recorder, a new value is only
+# written when it moved more than "deadband" (in the sensor unit) or "relative_deadband"
+# (share of the last written value) and "min_interval" seconds passed since the last
+# write.  TOTAL and TOTAL_INCREASING sensors are never throttled so energy stays exact
 
 
 SUNPOWER_BINARY_SENSORS = {
@@ -87,6 +174,14 @@ SUNPOWER_BINARY_SENSORS = {
                 "device": SensorDeviceClass.POWER,
                 "on_value": WORKING_STATE,
             },
+            "PVS_BREAKER": {
+                "field": "breaker_state",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} Circuit Breaker",
+                "device": BinarySensorDeviceClass.PROBLEM,
+                "on_value": BREAKER_OPEN,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "live": True,
+            },
         },
     },
 }
@@ -149,6 +244,8 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:gauge",
                 "device": None,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.1,
+                "min_interval": 300,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "PVS_ERROR_COUNT": {
@@ -194,6 +291,7 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:radio-tower",
                 "device": None,
                 "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.05,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "PVS_UPTIME": {
@@ -212,6 +310,7 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:memory",
                 "device": None,
                 "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.01,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "PVS_FLASH_AVAILABLE": {
@@ -221,6 +320,196 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:memory",
                 "device": None,
                 "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.01,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+            },
+            "PVS_POLL_INTERVAL": {
+                "field": "poll_interval",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} Poll Interval",
+                "unit": UnitOfTime.SECONDS,
+                "icon": "mdi:timer-sync-outline",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+            },
+            "PVS_DEVICE_LIST_REQUEST_TIME": {
+                "field": "device_list_request_time",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} DeviceList Request Time",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:timer-outline",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+            },
+            "PVS_DEVICE_LIST_CONNECT_TIME": {
+                "field": "device_list_connect_time",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} DeviceList Connect Time",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:lan-connect",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "enabled": False,
+            },
+            "PVS_DEVICE_LIST_TTFB": {
+                "field": "device_list_ttfb",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} DeviceList Time To First Byte",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:timer-sand",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "enabled": False,
+            },
+            "PVS_DEVICE_LIST_DOWNLOAD_TIME": {
+                "field": "device_list_download_time",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} DeviceList Download Time",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:download-network-outline",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "enabled": False,
+            },
+            "PVS_DEVICE_LIST_DECODE_TIME": {
+                "field": "device_list_decode_time",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} DeviceList Decode Time",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:code-json",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "enabled": False,
+            },
+            "PVS_DEVICE_LIST_CONVERT_TIME": {
+                "field": "device_list_convert_time",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} DeviceList Convert Time",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:cog-transfer-outline",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "enabled": False,
+            },
+            "PVS_DEVICE_LIST_BYTES": {
+                "field": "device_list_bytes",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} DeviceList Size",
+                "unit": UnitOfInformation.BYTES,
+                "icon": "mdi:file-download-outline",
+                "device": SensorDeviceClass.DATA_SIZE,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.01,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+            },
+            "PVS_DEVICE_LIST_DEVICES": {
+                "field": "device_list_devices",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} DeviceList Device Count",
+                "unit": None,
+                "icon": "mdi:counter",
+                "device": None,
+                "state": SensorStateClass.MEASUREMENT,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+            },
+            "PVS_ESS_STATUS_REQUEST_TIME": {
+                "field": "ess_status_request_time",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} ESS Status Request Time",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:timer-outline",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+            },
+            "PVS_ESS_STATUS_CONNECT_TIME": {
+                "field": "ess_status_connect_time",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} ESS Status Connect Time",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:lan-connect",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "enabled": False,
+            },
+            "PVS_ESS_STATUS_TTFB": {
+                "field": "ess_status_ttfb",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} ESS Status Time To First Byte",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:timer-sand",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "enabled": False,
+            },
+            "PVS_ESS_STATUS_DOWNLOAD_TIME": {
+                "field": "ess_status_download_time",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} ESS Status Download Time",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:download-network-outline",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "enabled": False,
+            },
+            "PVS_ESS_STATUS_DECODE_TIME": {
+                "field": "ess_status_decode_time",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} ESS Status Decode Time",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:code-json",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "enabled": False,
+            },
+            "PVS_ESS_STATUS_CONVERT_TIME": {
+                "field": "ess_status_convert_time",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} ESS Status Convert Time",
+                "unit": UnitOfTime.MILLISECONDS,
+                "icon": "mdi:cog-transfer-outline",
+                "device": SensorDeviceClass.DURATION,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.25,
+                "min_interval": 300,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+                "enabled": False,
+            },
+            "PVS_ESS_STATUS_BYTES": {
+                "field": "ess_status_bytes",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} ESS Status Size",
+                "unit": UnitOfInformation.BYTES,
+                "icon": "mdi:file-download-outline",
+                "device": SensorDeviceClass.DATA_SIZE,
+                "state": SensorStateClass.MEASUREMENT,
+                "relative_deadband": 0.01,
+                "entity_category": EntityCategory.DIAGNOSTIC,
+            },
+            "PVS_ESS_STATUS_DEVICES": {
+                "field": "ess_status_devices",
+                "title": "{SUN_POWER}{MODEL} {SERIAL} ESS Status Device Count",
+                "unit": None,
+                "icon": "mdi:counter",
+                "device": None,
+                "state": SensorStateClass.MEASUREMENT,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
         },
@@ -235,6 +524,7 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:flash",
                 "device": None,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.05,
             },
             "METER_NET_KWH": {
                 "field": "net_ltea_3phsum_kwh",
@@ -331,6 +621,7 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "METER_L2_V": {
@@ -340,6 +631,7 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "METER_L12_V": {
@@ -349,6 +641,7 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
             },
             "METER_TO_GRID": {
                 "field": "neg_ltea_3phsum_kwh",
@@ -394,6 +687,7 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "INVERTER_AMPS": {
@@ -430,6 +724,7 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "INVERTER_MPPT_A": {
@@ -448,6 +743,7 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:thermometer",
                 "device": SensorDeviceClass.TEMPERATURE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "INVERTER_FREQUENCY": {
@@ -457,6 +753,7 @@ SUNPOWER_SENSORS = {
                 "icon": "mdi:flash",
                 "device": None,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.05,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
         },
@@ -483,6 +780,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "SUNVAULT_TEMPERATURE": {
@@ -492,6 +790,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:thermometer",
                 "device": SensorDeviceClass.TEMPERATURE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "SUNVAULT_CUSTOMER_STATE_OF_CHARGE": {
@@ -563,6 +862,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "HUBPLUS_GRID_P2_V": {
@@ -572,6 +872,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             # "HUBPLUS_GRID_VOLTAGE_STATE": [
@@ -589,6 +890,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:water-percent",
                 "device": None,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 1,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "HUBPLUS_TEMPERATURE": {
@@ -598,6 +900,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:thermometer",
                 "device": SensorDeviceClass.TEMPERATURE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             # "HUBPLUS_LOAD_FREQUENCY_STATE": [
@@ -615,6 +918,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "HUBPLUS_LOAD_P2_V": {
@@ -624,6 +928,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             # "HUBPLUS_LOAD_VOLTAGE_STATE": [
@@ -662,6 +967,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
             },
             "BATTERY_TEMPERATURE": {
                 "field": "temperature",
@@ -670,6 +976,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:thermometer",
                 "device": SensorDeviceClass.TEMPERATURE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "BATTERY_CUSTOMER_STATE_OF_CHARGE": {
@@ -701,6 +1008,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:water-percent",
                 "device": None,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 1,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "ESS_TEMPERATURE": {
@@ -710,6 +1018,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:thermometer",
                 "device": SensorDeviceClass.TEMPERATURE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "ESS_POWER": {
@@ -745,6 +1054,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
             "ESS_METER_B_A": {
@@ -772,6 +1082,7 @@ SUNVAULT_SENSORS = {
                 "icon": "mdi:flash",
                 "device": SensorDeviceClass.VOLTAGE,
                 "state": SensorStateClass.MEASUREMENT,
+                "deadband": 0.5,
                 "entity_category": EntityCategory.DIAGNOSTIC,
             },
         },
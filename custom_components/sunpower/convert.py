@@ -0,0 +1,235 @@
+"""Conversion of raw PVS and ESS payloads into data[device_type][serial]."""
+
+import math
+from operator import itemgetter
+
+from .aggregate import (
+    aggregate,
+    fleet_state,
+)
+from .const import (
+    BATTERY_DEVICE_TYPE,
+    ESS_FIELD_PATHS,
+    INVERTER_DEVICE_TYPE,
+    METER_DEVICE_TYPE,
+    PVS_DEVICE_TYPE,
+    SUNPOWER_SENSORS,
+    SUNVAULT_DEVICE_TYPE,
+    SUNVAULT_SENSORS,
+)
+
+
+def _numeric_fields(*tables):
+    """Fields of every device type that the sensor tables treat as numbers"""
+    fields = {}
+    for table in tables:
+        for device_type, sensors in table.items():
+            fields.setdefault(device_type, set()).update(
+                sensor["field"]
+                for sensor in sensors["sensors"].values()
+                if sensor["state"] is not None
+            )
+    return {device_type: tuple(sorted(names)) for device_type, names in fields.items()}
+
+
+# Converted once per poll so entities and the virtual meter only handle numbers (or None)
+NUMERIC_FIELDS = _numeric_fields(SUNPOWER_SENSORS, SUNVAULT_SENSORS)
+
+
+def to_number(value):
+    """The PVS sends numbers as strings, things like 'unavailable' become None and so do
+    booleans, NaN and infinities which no sensor can show"""
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        if not math.isfinite(number):
+            return None
+        if "." not in value and number.is_integer():
+            return int(number)
+        return number
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and math.isfinite(value):
+        return value
+    return None
+
+
+def type_device(device_type, device):
+    """Convert the numeric fields of a device record in place"""
+    for field in NUMERIC_FIELDS.get(device_type, ()):
+        if field in device:
+            device[field] = to_number(device[field])
+    return device
+
+
+def create_vmeter(data):
+    # Create a virtual 'METER' that uses the sum of inverters
+    inverters = list(data.get(INVERTER_DEVICE_TYPE, {}).values())
+    totals = aggregate(
+        inverters,
+        sums=("ltea_3phsum_kwh", "p_mppt1_kw", "i_3phsum_a"),
+        means=("freq_hz", "vln_3phavg_v"),
+    )
+
+    pvs_serial = next(iter(data[PVS_DEVICE_TYPE]))  # only one PVS
+    vmeter_serial = f"{pvs_serial}pv"
+    data.setdefault(METER_DEVICE_TYPE, {})[vmeter_serial] = {
+        "SERIAL": vmeter_serial,
+        "TYPE": "PVS-METER-P",
+        "STATE": fleet_state(inverters),
+        "MODEL": "Virtual",
+        "DESCR": f"Power Meter {vmeter_serial}",
+        "DEVICE_TYPE": "Power Meter",
+        "interface": "virtual",
+        "SWVER": "1.0",
+        "HWVER": "Virtual",
+        "origin": "virtual",
+        "net_ltea_3phsum_kwh": totals["ltea_3phsum_kwh"],
+        "p_3phsum_kw": totals["p_mppt1_kw"],
+        "freq_hz": totals["freq_hz"],
+        "i_a": totals["i_3phsum_a"],
+        "v12_v": totals["vln_3phavg_v"],
+    }
+    return data
+
+
+def convert_sunpower_data(sunpower_data):
+    """Convert PVS data into indexable format data[device_type][serial]
+    Devices are copied so the raw sample stays untouched, with their numeric fields typed"""
+    data = {}
+    for device in sunpower_data["devices"]:
+        device_type = device["DEVICE_TYPE"]
+        data.setdefault(device_type, {})[device["SERIAL"]] = type_device(device_type, dict(device))
+
+    create_vmeter(data)
+
+    return data
+
+
+def compile_path(path):
+    """Function returning the value at path (a tuple of keys) in a nested dict, it raises
+    KeyError or TypeError when the path is not there"""
+    if len(path) == 1:
+        return itemgetter(path[0])
+    if len(path) == 2:
+        first, second = path
+        return lambda item: item[first][second]
+
+    def extract(item):
+        for key in path:
+            item = item[key]
+        return item
+
+    return extract
+
+
+def _compile_ess_paths(table):
+    """section: (device_type, ((field, path name, extractor), ...)) of ESS_FIELD_PATHS"""
+    return {
+        section: (
+            device_type,
+            tuple(
+                (field, ".".join((section, *path)), compile_path(path))
+                for field, path in paths.items()
+            ),
+        )
+        for section, (device_type, paths) in table.items()
+    }
+
+
+ESS_EXTRACTORS = _compile_ess_paths(ESS_FIELD_PATHS)
+
+# SunVault fields that are the sum or the average over its batteries
+SUNVAULT_SUMS = (
+    "sunvault_amperage",
+    "sunvault_power",
+    "sunvault_power_input",
+    "sunvault_power_output",
+)
+SUNVAULT_MEANS = (
+    "sunvault_voltage",
+    "sunvault_temperature",
+    "sunvault_customer_state_of_charge",
+    "sunvault_system_state_of_charge",
+)
+
+
+def battery_rollup(battery):
+    """What a battery contributes to the SunVault fields"""
+    amperage = battery.get("battery_amperage")
+    voltage = battery.get("battery_voltage")
+    power = None
+    if amperage is not None and voltage is not None:
+        power = amperage * voltage
+    return {
+        "sunvault_amperage": amperage,
+        "sunvault_voltage": voltage,
+        "sunvault_temperature": battery.get("temperature"),
+        "sunvault_customer_state_of_charge": battery.get("customer_state_of_charge"),
+        "sunvault_system_state_of_charge": battery.get("system_state_of_charge"),
+        "sunvault_power": power,
+        "sunvault_power_input": power if power is not None and amperage > 0 else 0,
+        "sunvault_power_output": abs(power) if power is not None and amperage < 0 else 0,
+    }
+
+
+def convert_ess_data(ess_data, data, missing=None):
+    """Integrate ESS data from its unique data source into the PVS data
+    Fields are filled as declared in ESS_FIELD_PATHS in a single pass that also collects
+    the SunVault totals.  A field whose path is not in the report is set to None and its
+    path added to the missing set when one is given, same for devices the PVS doesn't list"""
+    if missing is None:
+        missing = set()
+    report = ess_data["ess_report"]
+    batteries = []
+    totals = dict.fromkeys((*SUNVAULT_SUMS, *SUNVAULT_MEANS), 0.0)
+    counts = dict.fromkeys(totals, 0)
+    for section, (device_type, extractors) in ESS_EXTRACTORS.items():
+        devices = report.get(section)
+        if not devices:
+            missing.add(section)
+            continue
+        if isinstance(devices, dict):
+            devices = (devices,)  # hub_plus_status is a single device
+        records = data.get(device_type, {})
+        for device in devices:
+            record = records.get(device.get("serial_number"))
+            if record is None:
+                missing.add(f"{section}.{device.get('serial_number')}")
+                continue
+            for field, name, extract in extractors:
+                try:
+                    record[field] = extract(device)
+                except (KeyError, TypeError):
+                    record[field] = None
+                    missing.add(name)
+            if device_type == BATTERY_DEVICE_TYPE:
+                batteries.append(record)
+                for key, value in battery_rollup(record).items():
+                    if value is not None:
+                        totals[key] += value
+                        counts[key] += 1
+
+    # Generate a usable serial number for this virtual device, use PVS serial as base
+    # since we must be talking through one and it has a serial
+    pvs_serial = next(iter(data[PVS_DEVICE_TYPE]))  # only one PVS
+    sunvault_serial = f"sunvault_{pvs_serial}"
+    sunvault = {field: totals[field] for field in SUNVAULT_SUMS}
+    for field in SUNVAULT_MEANS:
+        sunvault[field] = totals[field] / counts[field] if counts[field] else None
+    sunvault.update(
+        {
+            "STATE": fleet_state(batteries),
+            "SERIAL": sunvault_serial,
+            "SWVER": "1.0",
+            "HWVER": "Virtual",
+            "DESCR": "Virtual SunVault",
+            "MODEL": "Virtual SunVault",
+        },
+    )
+    data[SUNVAULT_DEVICE_TYPE] = {sunvault_serial: sunvault}
+    return data
@@ -0,0 +1,568 @@
+"""Polling coordinator and per-endpoint scheduling for the sunpower integration."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+
+from .const import (
+    ESS_DEVICE_TYPE,
+    ESS_DEVICE_TYPES,
+    ESS_ENDPOINT,
+    ESS_FIELD_PATHS,
+    MIN_SUNPOWER_UPDATE_INTERVAL,
+    PVS_DEVICE_TYPE,
+    PVS_ENDPOINT,
+    SNAPSHOT_SAVE_DELAY,
+    SUNVAULT_DEVICE_TYPE,
+)
+from .convert import (
+    convert_ess_data,
+    convert_sunpower_data,
+    type_device,
+)
+from .sunpower import (
+    ESS_STATUS_COMMAND,
+    ConnectionException,
+    ParseException,
+    TimeoutException,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Wake up slightly early rather than a hair late and wait a whole extra cycle
+SCHEDULE_SLACK = 1
+
+# Adaptive polling: the PVS counts as busy when a DeviceList takes more than this share of
+# the interval or its load average is above ADAPTIVE_BUSY_LOAD, idle below the IDLE values
+ADAPTIVE_BUSY_LATENCY = 0.25
+ADAPTIVE_IDLE_LATENCY = 0.05
+ADAPTIVE_BUSY_LOAD = 1.0
+ADAPTIVE_IDLE_LOAD = 0.5
+ADAPTIVE_BACKOFF = 1.5
+ADAPTIVE_TIGHTEN = 0.9
+
+# The monitor request behind every endpoint, to find its timings in request_stats
+ENDPOINT_REQUESTS = {
+    PVS_ENDPOINT: "DeviceList",
+    ESS_ENDPOINT: ESS_STATUS_COMMAND,
+}
+# Request times kept per endpoint for the latency histogram in the diagnostics
+LATENCY_HISTORY_SIZE = 100
+
+
+class SunPowerScheduler:
+    """Deadline based scheduler keeping every PVS endpoint on its own cadence.
+    Deadlines advance from the previous deadline rather than from when the fetch happened
+    so intervals that are not multiples of each other do not drift"""
+
+    def __init__(self, intervals):
+        """Initialize with a dict of endpoint -> interval in seconds"""
+        self._intervals = dict(intervals)
+        self._deadlines = {}
+        self._active = set(self._intervals)
+
+    def set_active(self, endpoint, active, now):
+        """Enable or disable polling of endpoint, a newly enabled endpoint is due now"""
+        if active and endpoint not in self._active:
+            self._active.add(endpoint)
+            self._deadlines[endpoint] = now
+        elif not active:
+            self._active.discard(endpoint)
+
+    def due(self, now):
+        """Endpoints that should be fetched now"""
+        return {
+            endpoint
+            for endpoint in self._active
+            if self._deadlines.get(endpoint, now) <= now + SCHEDULE_SLACK
+        }
+
+    def complete(self, endpoint, now):
+        """Advance the deadline of endpoint after it was fetched, or tried to be"""
+        interval = self._intervals[endpoint]
+        deadline = self._deadlines.get(endpoint, now) + interval
+        if deadline <= now:
+            # Missed one or more slots (slow PVS), skip them rather than bursting to catch up
+            deadline = now + interval
+        self._deadlines[endpoint] = deadline
+
+    def interval(self, endpoint):
+        """Current interval of endpoint in seconds"""
+        return self._intervals[endpoint]
+
+    def set_interval(self, endpoint, interval):
+        """Change the interval of endpoint, applies from its next deadline"""
+        self._intervals[endpoint] = interval
+
+    def next_deadline(self):
+        """When the next active endpoint is due"""
+        return min(self._deadlines.get(endpoint, 0) for endpoint in self._active)
+
+
+def _as_float(value, default=0.0):
+    """PVS values are mostly strings and sometimes things like 'unavailable'"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class SunPowerAdaptiveInterval:
+    """Pick the DeviceList interval from how hard the PVS is working.
+    Backs off when a DeviceList is slow, the PVS load is high or it skipped panel scans and
+    tightens again when it is idle, always between minimum and maximum and never faster
+    than the PVS scans its panels (dl_scan_time)"""
+
+    def __init__(self, interval, minimum, maximum):
+        """Initialize."""
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.interval = self._clamp(interval)
+        self._skipped_scans = None
+
+    def _clamp(self, interval):
+        return min(max(interval, self.minimum), self.maximum)
+
+    def update(self, latency, pvs):
+        """Adjust from the latency of the last DeviceList and the PVS record it returned"""
+        load = _as_float(pvs.get("dl_cpu_load"))
+        skipped_scans = _as_float(pvs.get("dl_skipped_scans"))
+        skipped = self._skipped_scans is not None and skipped_scans > self._skipped_scans
+        self._skipped_scans = skipped_scans
+
+        if latency > self.interval * ADAPTIVE_BUSY_LATENCY or load > ADAPTIVE_BUSY_LOAD or skipped:
+            interval = self.interval * ADAPTIVE_BACKOFF
+        elif latency < self.interval * ADAPTIVE_IDLE_LATENCY and load < ADAPTIVE_IDLE_LOAD:
+            interval = self.interval * ADAPTIVE_TIGHTEN
+        else:
+            interval = self.interval
+        interval = max(interval, _as_float(pvs.get("dl_scan_time")))
+        self.interval = round(self._clamp(interval))
+        return self.interval
+
+    def failed(self):
+        """A DeviceList failed, most likely a timeout so give the PVS more room"""
+        self.interval = round(self._clamp(self.interval * ADAPTIVE_BACKOFF))
+        return self.interval
+
+
+def diff_data(old, new):
+    """(device_type, serial, field) of every value that is new or differs in new"""
+    changed = set()
+    for device_type, devices in new.items():
+        old_devices = old.get(device_type, {})
+        for serial, device in devices.items():
+            old_device = old_devices.get(serial)
+            if old_device == device:
+                continue  # most of the time, e.g. inverters asleep at night
+            if old_device is None:
+                old_device = {}
+            for field, value in device.items():
+                if field not in old_device or old_device[field] != value:
+                    changed.add((device_type, serial, field))
+    return changed
+
+
+async def fetch_before(fetch, request, deadline, deadline_at):
+    """Await the fetch of request, failing it with a TimeoutException once the loop time
+    passed deadline_at (None for no deadline)"""
+    try:
+        async with asyncio.timeout_at(deadline_at):
+            return await fetch
+    except TimeoutError as error:
+        message = f"{request} missed the refresh deadline of {deadline}s"
+        raise TimeoutException(message) from error
+
+
+async def fetch_into(sample_cache, sunpower_monitor, endpoint, request, fetch):
+    """Await fetch and store the sample in the cache as soon as it arrives, so its fetch
+    duration does not include whatever was fetched alongside.  It is timed from when request
+    was sent, a request joined from a refresh that missed its deadline started back then"""
+    sample = await fetch
+    sample_cache.store(endpoint, sample, time.time(), sunpower_monitor.request_started(request))
+    return sample
+
+
+async def sunpower_fetch(sunpower_monitor, sample_cache, endpoints, stats=None, deadline=None):
+    """Basic data fetch routine to get and reformat sunpower data to a dict of device
+    type and serial #
+    Only the endpoints given are fetched, others are served from the sample cache.  An ESS
+    discovered in a fresh DeviceList is fetched right away and added to endpoints.
+    When given a stats dict the convert time (ms) and device count of every endpoint are
+    stored in it, for the ESS also the paths missing from its report.
+    A failing ESS does not throw away the DeviceList, the data comes back without the ESS
+    values and stats[ESS_ENDPOINT] only holds the error.
+    With a deadline (seconds) the requests are cancelled once it passes, failing the same way
+    as a timeout of the endpoint that was still being fetched"""
+    if stats is None:
+        stats = {}
+    loop = asyncio.get_running_loop()
+    deadline_at = None if deadline is None else loop.time() + deadline
+    use_ess = False
+    data = None
+    ess_data = None
+    ess_error = None
+
+    now = time.time()
+    fetch_pvs = PVS_ENDPOINT in endpoints
+    # The ESS is only announced in the DeviceList, so go by the previous one to decide
+    # if its status can be requested alongside a new DeviceList
+    fetch_both = fetch_pvs and ESS_ENDPOINT in endpoints and sample_cache.has_ess
+
+    try:
+        if fetch_both:
+            sample_cache.begin_fetch(PVS_ENDPOINT, now)
+            sample_cache.begin_fetch(ESS_ENDPOINT, now)
+            sunpower_data, ess_data = await asyncio.gather(
+                fetch_into(
+                    sample_cache,
+                    sunpower_monitor,
+                    PVS_ENDPOINT,
+                    "DeviceList",
+                    fetch_before(
+                        sunpower_monitor.device_list(),
+                        "DeviceList",
+                        deadline,
+                        deadline_at,
+                    ),
+                ),
+                fetch_into(
+                    sample_cache,
+                    sunpower_monitor,
+                    ESS_ENDPOINT,
+                    ESS_STATUS_COMMAND,
+                    fetch_before(
+                        sunpower_monitor.energy_storage_system_status(),
+                        ESS_STATUS_COMMAND,
+                        deadline,
+                        deadline_at,
+                    ),
+                ),
+                return_exceptions=True,
+            )
+            if isinstance(sunpower_data, BaseException):
+                raise sunpower_data
+            _LOGGER.debug("got PVS data %s", sunpower_data)
+            if isinstance(ess_data, (ParseException, ConnectionException)):
+                ess_error = ess_data
+            elif isinstance(ess_data, BaseException):
+                raise ess_data
+            else:
+                _LOGGER.debug("got ESS data %s", ess_data)
+        elif fetch_pvs:
+            sample_cache.begin_fetch(PVS_ENDPOINT, now)
+            sunpower_data = await fetch_into(
+                sample_cache,
+                sunpower_monitor,
+                PVS_ENDPOINT,
+                "DeviceList",
+                fetch_before(sunpower_monitor.device_list(), "DeviceList", deadline, deadline_at),
+            )
+            _LOGGER.debug("got PVS data %s", sunpower_data)
+        else:
+            sunpower_data = sample_cache.reuse(PVS_ENDPOINT)
+    except (ParseException, ConnectionException) as error:
+        raise UpdateFailed from error
+
+    if not sunpower_data:
+        raise UpdateFailed("No PVS data available yet")
+    start = time.perf_counter()
+    data = convert_sunpower_data(sunpower_data)
+    stats[PVS_ENDPOINT] = {
+        "convert_time": (time.perf_counter() - start) * 1000,
+        "devices": len(sunpower_data.get("devices", [])),
+    }
+    if ESS_DEVICE_TYPE in data:  # Look for an ESS in PVS data
+        use_ess = True
+
+    try:
+        if use_ess and not fetch_both:
+            if ESS_ENDPOINT in endpoints or not sample_cache.sample(ESS_ENDPOINT):
+                endpoints.add(ESS_ENDPOINT)
+                sample_cache.begin_fetch(ESS_ENDPOINT, time.time())
+                ess_data = await fetch_into(
+                    sample_cache,
+                    sunpower_monitor,
+                    ESS_ENDPOINT,
+                    ESS_STATUS_COMMAND,
+                    fetch_before(
+                        sunpower_monitor.energy_storage_system_status(),
+                        ESS_STATUS_COMMAND,
+                        deadline,
+                        deadline_at,
+                    ),
+                )
+                _LOGGER.debug("got ESS data %s", ess_data)
+            else:
+                ess_data = sample_cache.reuse(ESS_ENDPOINT)
+    except (ParseException, ConnectionException) as error:
+        ess_error = error
+
+    if use_ess and ess_error is None:
+        start = time.perf_counter()
+        missing = set()
+        try:
+            convert_ess_data(
+                ess_data,
+                data,
+                missing,
+            )  # ess converter appends to items in existing PVS structure
+        except (KeyError, TypeError, AttributeError) as error:
+            # A report shaped unlike any seen before, same as not getting one
+            ess_error = error
+        else:
+            stats[ESS_ENDPOINT] = {
+                "convert_time": (time.perf_counter() - start) * 1000,
+                "devices": sum(len(data.get(device_type, {})) for device_type in ESS_DEVICE_TYPES),
+                "missing": sorted(missing),
+            }
+    if ess_error is not None:
+        _LOGGER.debug("ESS update failed, keeping the PVS data: %r", ess_error)
+        stats[ESS_ENDPOINT] = {"error": repr(ess_error)}
+    return data
+
+
+class SunPowerDataUpdateCoordinator(DataUpdateCoordinator):
+    """Coordinator waking up whenever the next PVS endpoint is due"""
+
+    def __init__(
+        self,
+        hass,
+        sunpower_monitor,
+        sample_cache,
+        sunpower_update_invertal,
+        sunvault_update_invertal,
+        adaptive_max_interval=None,
+        snapshot_store=None,
+        max_staleness=0,
+    ):
+        """Initialize, adaptive_max_interval enables adaptive DeviceList polling and a
+        snapshot_store persists the data for async_restore_snapshot"""
+        self.sunpower_monitor = sunpower_monitor
+        self.sample_cache = sample_cache
+        self.snapshot_store = snapshot_store
+        self.max_staleness = max_staleness
+        # The data is a restored snapshot or kept through a failed refresh
+        self.stale = False
+        self.adaptive_interval = None
+        if adaptive_max_interval is not None:
+            self.adaptive_interval = SunPowerAdaptiveInterval(
+                sunpower_update_invertal,
+                MIN_SUNPOWER_UPDATE_INTERVAL,
+                adaptive_max_interval,
+            )
+            sunpower_update_invertal = self.adaptive_interval.interval
+        self.scheduler = SunPowerScheduler(
+            {
+                PVS_ENDPOINT: sunpower_update_invertal,
+                ESS_ENDPOINT: sunvault_update_invertal,
+            },
+        )
+        # Until a DeviceList shows an ESS there is nothing to poll there
+        self.scheduler.set_active(ESS_ENDPOINT, False, time.monotonic())
+        # (device_type, serial, field) that differ from the previous refresh, None for all
+        self.changed = None
+        # Endpoints whose last fetch failed, their values are kept from before
+        self.failed_endpoints = set()
+        self.failures = dict.fromkeys(ENDPOINT_REQUESTS, 0)
+        self._success_times = {}
+        self.poll_stats = {}
+        self.latency_history = {
+            endpoint: deque(maxlen=LATENCY_HISTORY_SIZE) for endpoint in ENDPOINT_REQUESTS
+        }
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="SunPower PVS",
+            update_interval=timedelta(seconds=sunpower_update_invertal),
+        )
+
+    def _snapshot(self):
+        return {"data": self.data}
+
+    async def async_restore_snapshot(self):
+        """Load the last persisted data so entities exist before the PVS answers"""
+        if self.snapshot_store is None:
+            return
+        snapshot = await self.snapshot_store.async_load()
+        if not snapshot or not snapshot.get("data"):
+            return
+        _LOGGER.debug("Restored SunPower snapshot, marked stale until fresh data arrives")
+        # Snapshots written by older versions still hold the numbers as strings
+        for device_type, devices in snapshot["data"].items():
+            for device in devices.values():
+                type_device(device_type, device)
+        self.data = snapshot["data"]
+        self.stale = True
+        self._update_breaker_state()
+
+    def data_age(self, endpoint):
+        """Seconds since endpoint was last fetched successfully, None if it never was"""
+        success_time = self._success_times.get(endpoint)
+        if success_time is None:
+            return None
+        return time.time() - success_time
+
+    def endpoint_stale(self, endpoint):
+        """If the data of endpoint is not from its latest fetch"""
+        return self.stale or endpoint in self.failed_endpoints
+
+    def endpoint_expired(self, endpoint):
+        """If endpoint kept failing for longer than max_staleness"""
+        if endpoint not in self.failed_endpoints:
+            return False
+        age = self.data_age(endpoint)
+        return age is None or age > self.max_staleness
+
+    def _keep_ess_data(self, data):
+        """Carry the ESS values of the previous data over into data after the ESS failed"""
+        if not self.data:
+            return
+        for device_type, paths in ESS_FIELD_PATHS.values():
+            previous_devices = self.data.get(device_type, {})
+            for serial, device in data.get(device_type, {}).items():
+                previous = previous_devices.get(serial, {})
+                device.update({field: previous[field] for field in paths if field in previous})
+        if SUNVAULT_DEVICE_TYPE in self.data:
+            data[SUNVAULT_DEVICE_TYPE] = self.data[SUNVAULT_DEVICE_TYPE]
+
+    def _refresh_deadline(self, endpoints):
+        """Seconds a refresh of endpoints may take, it must be over before the next is due"""
+        return max((self.scheduler.interval(endpoint) for endpoint in endpoints), default=None)
+
+    def _update_breaker_state(self):
+        """Put the breaker state in the PVS record of the current data, returns the change"""
+        if not self.data or not self.data.get(PVS_DEVICE_TYPE):
+            return set()
+        serial, pvs = next(iter(self.data[PVS_DEVICE_TYPE].items()))
+        state = self.sunpower_monitor.breaker.state
+        if pvs.get("breaker_state") == state:
+            return set()
+        pvs["breaker_state"] = state
+        return {(PVS_DEVICE_TYPE, serial, "breaker_state")}
+
+    def _can_serve_stale(self, endpoints):
+        """If the last data may still be served after a failed refresh of endpoints, until
+        they went max_staleness seconds without a successful fetch"""
+        if not self.max_staleness or not self.data:
+            return False
+        ages = [self.data_age(endpoint) for endpoint in endpoints]
+        return all(age is not None and age <= self.max_staleness for age in ages)
+
+    def _record_stats(self, endpoints, convert_stats, pvs):
+        """Collect the timings of this refresh into poll_stats and put them in the PVS record
+        as <endpoint>_<stat> for the diagnostic sensors, for the ESS poll_stats also lists
+        the paths its last report was missing"""
+        request_stats = self.sunpower_monitor.request_stats
+        for endpoint, request in ENDPOINT_REQUESTS.items():
+            if endpoint not in convert_stats:
+                continue
+            stats = self.poll_stats.setdefault(endpoint, {})
+            if "error" in convert_stats[endpoint]:
+                # Keep the timings of the last success for the sensors
+                stats["error"] = convert_stats[endpoint]["error"]
+            else:
+                if endpoint in endpoints:
+                    stats.pop("error", None)
+                if endpoint in endpoints and request in request_stats:
+                    stats.update(request_stats[request])
+                    self.latency_history[endpoint].append(round(stats["request_time"], 1))
+                missing = convert_stats[endpoint].get("missing")
+                if missing and missing != stats.get("missing"):
+                    _LOGGER.warning(
+                        "%s is missing %s, their sensors will be unknown",
+                        request,
+                        ", ".join(missing),
+                    )
+                stats.update(convert_stats[endpoint])
+            for stat, value in stats.items():
+                if isinstance(value, (int, float)):
+                    pvs[f"{endpoint}_{stat}"] = round(value, 2)
+
+    async def _async_update_data(self):
+        """Fetch the endpoints that are due, used by coordinator to get mass data updates.
+        A failed refresh serves the last data marked stale while _can_serve_stale allows, a
+        failing ESS only keeps its own values and marks them stale"""
+        now = time.monotonic()
+        endpoints = self.scheduler.due(now)
+        if not self.sample_cache.sample(PVS_ENDPOINT):
+            # Without any DeviceList yet there is nothing the cache could serve
+            endpoints.add(PVS_ENDPOINT)
+        _LOGGER.debug("Updating SunPower data for %s", endpoints)
+        convert_stats = {}
+        try:
+            data = await sunpower_fetch(
+                self.sunpower_monitor,
+                self.sample_cache,
+                endpoints,
+                convert_stats,
+                self._refresh_deadline(endpoints),
+            )
+        except UpdateFailed as error:
+            self.failures[PVS_ENDPOINT] += 1
+            if self.adaptive_interval is not None and PVS_ENDPOINT in endpoints:
+                self.scheduler.set_interval(PVS_ENDPOINT, self.adaptive_interval.failed())
+            # Stale entities write anyway since their age moved on, the breaker may have opened
+            self.changed = self._update_breaker_state()
+            if not self._can_serve_stale(endpoints):
+                if self.changed:
+                    # The coordinator doesn't tell listeners of failures after the first one
+                    self.async_update_listeners()
+                raise
+            if not self.stale:
+                _LOGGER.warning(
+                    "Failed to update SunPower data (%r), keeping the last data for up to %ss",
+                    error.__cause__ or error,
+                    self.max_staleness,
+                )
+            self.stale = True
+            return self.data
+        else:
+            failed = {endpoint for endpoint, stats in convert_stats.items() if "error" in stats}
+            for endpoint in failed:
+                self.failures[endpoint] += 1
+            if ESS_ENDPOINT in failed:
+                if ESS_ENDPOINT not in self.failed_endpoints:
+                    _LOGGER.warning(
+                        "Failed to update the SunPower ESS (%s), keeping its last data",
+                        convert_stats[ESS_ENDPOINT]["error"],
+                    )
+                self._keep_ess_data(data)
+            success_time = time.time()
+            for endpoint in endpoints - failed:
+                self._success_times[endpoint] = success_time
+            # Endpoints served from the cache this time are as failed as they were
+            self.failed_endpoints = (self.failed_endpoints - endpoints) | failed
+            self.scheduler.set_active(ESS_ENDPOINT, ESS_DEVICE_TYPE in data, now)
+            pvs = next(iter(data[PVS_DEVICE_TYPE].values()))
+            if self.adaptive_interval is not None and PVS_ENDPOINT in endpoints:
+                self.scheduler.set_interval(
+                    PVS_ENDPOINT,
+                    self.adaptive_interval.update(
+                        self.sample_cache.fetch_duration(PVS_ENDPOINT),
+                        pvs,
+                    ),
+                )
+            pvs["poll_interval"] = self.scheduler.interval(PVS_ENDPOINT)
+            pvs["breaker_state"] = self.sunpower_monitor.breaker.state
+            self._record_stats(endpoints, convert_stats, pvs)
+            # Leaving a restored snapshot changes the stale attribute of every entity
+            self.changed = None if self.stale or not self.data else diff_data(self.data, data)
+            self.stale = False
+            if self.snapshot_store is not None:
+                self.snapshot_store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+            return data
+        finally:
+            for endpoint in endpoints:
+                self.scheduler.complete(endpoint, now)
+            self.update_interval = timedelta(
+                seconds=max(self.scheduler.next_deadline() - time.monotonic(), SCHEDULE_SLACK),
+            )
+            _LOGGER.debug("Next SunPower update in %s", self.update_interval)
@@ -0,0 +1,78 @@
+"""Diagnostics support for the sunpower integration."""
+
+from homeassistant.components.diagnostics import (
+    REDACTED,
+    async_redact_data,
+)
+
+from .const import (
+    DOMAIN,
+    SUNPOWER_CACHE,
+    SUNPOWER_COORDINATOR,
+    SUNPOWER_HOST,
+    SUNPOWER_OBJECT,
+)
+
+TO_REDACT = {SUNPOWER_HOST}
+
+# Upper bounds (ms) of the request time histogram buckets, the default read timeout is 120s
+LATENCY_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+
+def latency_histogram(latencies):
+    """Count request times per bucket, keyed by the bucket's upper bound"""
+    histogram = {f"<={bucket}ms": 0 for bucket in LATENCY_BUCKETS}
+    histogram[f">{LATENCY_BUCKETS[-1]}ms"] = 0
+    for latency in latencies:
+        for bucket in LATENCY_BUCKETS:
+            if latency <= bucket:
+                histogram[f"<={bucket}ms"] += 1
+                break
+        else:
+            histogram[f">{LATENCY_BUCKETS[-1]}ms"] += 1
+    return histogram
+
+
+def redact_host(poll_stats, host):
+    """poll_stats with the host hidden in the error messages, connection errors name it"""
+    return {
+        endpoint: {
+            stat: value.replace(host, REDACTED) if isinstance(value, str) else value
+            for stat, value in stats.items()
+        }
+        for endpoint, stats in poll_stats.items()
+    }
+
+
+async def async_get_config_entry_diagnostics(hass, entry):
+    """Return diagnostics for a config entry"""
+    sunpower_state = hass.data[DOMAIN][entry.entry_id]
+    coordinator = sunpower_state[SUNPOWER_COORDINATOR]
+    latencies = {
+        endpoint: {
+            "samples": len(history),
+            "min": min(history, default=None),
+            "max": max(history, default=None),
+            "histogram": latency_histogram(history),
+        }
+        for endpoint, history in coordinator.latency_history.items()
+    }
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "update_interval": coordinator.update_interval.total_seconds(),
+        "stale": coordinator.stale,
+        "failed_endpoints": sorted(coordinator.failed_endpoints),
+        "failures": coordinator.failures,
+        "data_age": {
+            endpoint: coordinator.data_age(endpoint) for endpoint in coordinator.latency_history
+        },
+        "poll_stats": redact_host(coordinator.poll_stats, entry.data[SUNPOWER_HOST]),
+        "latency": latencies,
+        "connections": sunpower_state[SUNPOWER_OBJECT].connection_stats,
+        "breaker": sunpower_state[SUNPOWER_OBJECT].breaker.stats,
+        "single_flight": sunpower_state[SUNPOWER_OBJECT].single_flight.stats,
+        "cache": sunpower_state[SUNPOWER_CACHE].stats,
+    }
@@ -1,36 +1,232 @@
 """The Sunpower integration base entity."""
 
+import logging
+from dataclasses import dataclass
+
+from homeassistant.const import EntityCategory
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    ESS_DEVICE_TYPE,
+    ESS_DEVICE_TYPES,
+    ESS_ENDPOINT,
+    PVS_DEVICE_TYPE,
+    PVS_ENDPOINT,
+    SUNPOWER_DATA_READY,
+    SUNPOWER_DESCRIPTIVE_NAMES,
+    SUNPOWER_PRODUCT_NAMES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class SunPowerEntityDescription:
+    """One entry of the sensor tables in const.py, compiled once at import"""
+
+    key: str
+    device_type: str
+    id_code: str
+    field: str
+    title: str
+    entity_category: EntityCategory | None = None
+
+
+def compile_descriptions(table, describe):
+    """Turn a sensor table into {device_type: (description, ...)}, describe builds the
+    description from (key, device_type, id_code, template)"""
+    return {
+        device_type: tuple(
+            describe(key, device_type, group["unique_id"], template)
+            for key, template in group["sensors"].items()
+        )
+        for device_type, group in table.items()
+    }
+
+
+def entity_targets(config_entry, coordinator, descriptions, ess_descriptions):
+    """Yield (description, device, device_info, title) for every entity the devices in the
+    coordinator data should get, the ESS descriptions only count when there is an ESS"""
+    do_descriptive_names = config_entry.data.get(SUNPOWER_DESCRIPTIVE_NAMES, False)
+    do_product_names = config_entry.data.get(SUNPOWER_PRODUCT_NAMES, False)
+
+    sunpower_data = coordinator.data
+    if PVS_DEVICE_TYPE not in sunpower_data:
+        _LOGGER.error("Cannot find PVS Entry")
+        return
+    pvs = next(iter(sunpower_data[PVS_DEVICE_TYPE].values()))
+
+    if ESS_DEVICE_TYPE in sunpower_data:
+        descriptions = {**descriptions, **ess_descriptions}
+    else:
+        _LOGGER.debug("Found No ESS Data")
+
+    names = {
+        "SUN_POWER": "" if not do_product_names else "SunPower ",
+        "SUN_VAULT": "" if not do_product_names else "SunVault ",
+        "PVS": "" if not do_product_names else "PVS ",
+    }
+    for device_type, device_descriptions in descriptions.items():
+        if device_type not in sunpower_data:
+            _LOGGER.error(f"Cannot find any {device_type}")
+            continue
+        parent = pvs if device_type != PVS_DEVICE_TYPE else None
+        for index, device in enumerate(sunpower_data[device_type].values()):
+            device_info = sunpower_device_info(device, parent)
+            names.update(
+                index="" if not do_descriptive_names else f"{index + 1} ",
+                TYPE="" if not do_descriptive_names else f"{device.get('TYPE', '')} ",
+                DESCR="" if not do_descriptive_names else f"{device.get('DESCR', '')} ",
+                SERIAL=device.get("SERIAL", "Unknown"),
+                MODEL=device.get("MODEL", "Unknown"),
+            )
+            for description in device_descriptions:
+                yield description, device, device_info, description.title.format(**names)
+
+
+@callback
+def async_when_data_ready(sunpower_state, coordinator, add_entities):
+    """Call add_entities now if the coordinator has data, otherwise once the first refresh
+    running in the background gets some"""
+    if coordinator.data:
+        add_entities()
+    else:
+        sunpower_state[SUNPOWER_DATA_READY].append(add_entities)
+
+
+@callback
+def async_add_data_entities(config_entry, coordinator, create, async_add_entities):
+    """Add the entities create(config_entry, coordinator) makes for the current data.
+    An ESS that failed before its first report leaves its fields out of the data, the
+    entities reading them are added once it answers"""
+    entities = create(config_entry, coordinator)
+    async_add_entities(entities)
+    if ESS_ENDPOINT not in coordinator.failed_endpoints:
+        return
+    known = {entity.unique_id for entity in entities}
+
+    @callback
+    def async_add_ess_entities():
+        if not known or ESS_ENDPOINT in coordinator.failed_endpoints:
+            return
+        new_entities = [
+            entity for entity in create(config_entry, coordinator) if entity.unique_id not in known
+        ]
+        known.clear()  # done, the listener stays until unload but has nothing left to do
+        if new_entities:
+            async_add_entities(new_entities)
+
+    config_entry.async_on_unload(coordinator.async_add_listener(async_add_ess_entities))
+
+
+def sunpower_device_info(my_info, parent_info):
+    """Device registry info of a device, shared by all of its entities"""
+    serial = my_info.get("SERIAL", "UnknownSerial")
+    model = my_info.get("MODEL", "UnknownModel")
+    name = my_info.get("DESCR", f"{model} {serial}")
+    hw_version = my_info.get("HWVER", my_info.get("hw_version", "Unknown"))
+    sw_version = my_info.get("SWVER", "Unknown")
+    version = f"{sw_version} Hardware: {hw_version}"
+    device_info = {
+        "identifiers": {(DOMAIN, my_info.get("SERIAL", ""))},
+        "name": name,
+        "manufacturer": "SunPower",
+        "model": model,
+        "sw_version": version,
+    }
+    if parent_info is not None:
+        device_info["via_device"] = (
+            DOMAIN,
+            f"{parent_info.get('SERIAL', 'UnknownParent')}",
+        )
+    return device_info
 
 
 class SunPowerEntity(CoordinatorEntity):
-    def __init__(self, coordinator, my_info, parent_info):
+    """Base of the sunpower entities.
+    What never changes (unique id, device info, name) is worked out once in __init__ and
+    the rest is read from the shared description, a big site has thousands of these so
+    they keep as little per entity as possible"""
+
+    def __init__(self, coordinator, description, my_info, device_info, title):
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._my_info = my_info
-        self._parent_info = parent_info
-        self.base_unique_id = self._my_info.get("SERIAL", "")
+        self._description = description
+        self._device_type = description.device_type
+        self._field = description.field
+        self.base_unique_id = my_info.get("SERIAL", "")
+        self._written_available = None
+        self._written_stale = False
+        # https://developers.home-assistant.io/docs/entity_registry_index/#unique-id
+        # Should not include the domain, home assistant does that for us
+        # base_unique_id is the serial number of the device (Inverter, PVS, Meter etc)
+        # "_pvs_" just as a divider - in case we start pulling data from some other source
+        # _field is the field within the data that this came from which is a dict so there
+        # is only one.
+        # Updating this format is a breaking change and should be called out if changed in a PR
+        self._attr_unique_id = f"{self.base_unique_id}_pvs_{self._field}"
+        self._attr_device_info = device_info
+        self._attr_name = title
+        self._bind()
+
+    def _bind(self):
+        """Find our device record in the current data, once per refresh so reading the
+        state does not have to dig through the whole data again"""
+        devices = (self.coordinator.data or {}).get(self._device_type)
+        self._record = devices.get(self.base_unique_id) if devices else None
+        self._bind_value(self._record)
+
+    def _bind_value(self, record):
+        """Take our value from record, None when the device is gone"""
+
+    def _endpoint(self):
+        """The PVS endpoint our data comes from"""
+        return ESS_ENDPOINT if self._device_type in ESS_DEVICE_TYPES else PVS_ENDPOINT
+
+    def _stale(self):
+        """If our data is not from the latest fetch of our endpoint"""
+        return self.coordinator.endpoint_stale(self._endpoint())
 
     @property
-    def device_info(self):
-        serial = self._my_info.get("SERIAL", "UnknownSerial")
-        model = self._my_info.get("MODEL", "UnknownModel")
-        name = self._my_info.get("DESCR", f"{model} {serial}")
-        hw_version = self._my_info.get("HWVER", self._my_info.get("hw_version", "Unknown"))
-        sw_version = self._my_info.get("SWVER", "Unknown")
-        version = f"{sw_version} Hardware: {hw_version}"
-        device_info = {
-            "identifiers": {(DOMAIN, self.base_unique_id)},
-            "name": name,
-            "manufacturer": "SunPower",
-            "model": model,
-            "sw_version": version,
-        }
-        if self._parent_info is not None:
-            device_info["via_device"] = (
-                DOMAIN,
-                f"{self._parent_info.get('SERIAL', 'UnknownParent')}",
-            )
-        return device_info
+    def available(self):
+        """Unavailable when the PVS stopped reporting our device or our endpoint kept
+        failing for too long"""
+        if self._record is None or not super().available:
+            return False
+        return not self.coordinator.endpoint_expired(self._endpoint())
+
+    @property
+    def entity_category(self):
+        return self._description.entity_category
+
+    @property
+    def extra_state_attributes(self):
+        """Flag data restored from the last snapshot or kept through failed refreshes until
+        the PVS answers again, with its age in seconds when it is known"""
+        if not self._stale():
+            return None
+        age = self.coordinator.data_age(self._endpoint())
+        if age is None:
+            return {"stale": True}
+        return {"stale": True, "age": round(age)}
+
+    def _value_changed(self):
+        """If the last coordinator update changed the field behind this entity"""
+        changed = self.coordinator.changed
+        return changed is None or (self._device_type, self.base_unique_id, self._field) in changed
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Only write state when our value or availability changed, or while we show stale
+        data since its age attribute moves on"""
+        self._bind()
+        available = self.available
+        stale = available and self._stale()
+        must_write = available != self._written_available or stale or self._written_stale
+        if not must_write and not self._value_changed():
+            return
+        self._written_available = available
+        self._written_stale = stale
+        super()._handle_coordinator_update()
@@ -1,23 +1,34 @@
 """Support for Sunpower sensors."""
 
 import logging
+import time
+from dataclasses import dataclass
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorStateClass,
 )
+from homeassistant.core import callback
 
 from .const import (
+    DEFAULT_SUNPOWER_MIN_WRITE_INTERVAL,
     DOMAIN,
-    ESS_DEVICE_TYPE,
-    PVS_DEVICE_TYPE,
     SUNPOWER_COORDINATOR,
-    SUNPOWER_DESCRIPTIVE_NAMES,
-    SUNPOWER_PRODUCT_NAMES,
+    SUNPOWER_MIN_WRITE_INTERVAL,
     SUNPOWER_SENSORS,
+    SUNPOWER_THROTTLE_WRITES,
     SUNVAULT_SENSORS,
 )
-from .entity import SunPowerEntity
+from .entity import (
+    SunPowerEntity,
+    SunPowerEntityDescription,
+    async_add_data_entities,
+    async_when_data_ready,
+    compile_descriptions,
+    entity_targets,
+)
+from .throttle import SunPowerWriteThrottle
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,162 +37,145 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Sunpower sensors."""
     sunpower_state = hass.data[DOMAIN][config_entry.entry_id]
     _LOGGER.debug("Sunpower_state: %s", sunpower_state)
-
-    do_descriptive_names = False
-    if SUNPOWER_DESCRIPTIVE_NAMES in config_entry.data:
-        do_descriptive_names = config_entry.data[SUNPOWER_DESCRIPTIVE_NAMES]
-
-    do_product_names = False
-    if SUNPOWER_PRODUCT_NAMES in config_entry.data:
-        do_product_names = config_entry.data[SUNPOWER_PRODUCT_NAMES]
-
     coordinator = sunpower_state[SUNPOWER_COORDINATOR]
-    sunpower_data = coordinator.data
-
-    do_ess = False
-    if ESS_DEVICE_TYPE in sunpower_data:
-        do_ess = True
-    else:
-        _LOGGER.debug("Found No ESS Data")
-
-    if PVS_DEVICE_TYPE not in sunpower_data:
-        _LOGGER.error("Cannot find PVS Entry")
-    else:
-        entities = []
-
-        pvs = next(iter(sunpower_data[PVS_DEVICE_TYPE].values()))
-
-        SENSORS = SUNPOWER_SENSORS
-        if do_ess:
-            SENSORS.update(SUNVAULT_SENSORS)
-
-        for device_type in SENSORS:
-            if device_type not in sunpower_data:
-                _LOGGER.error(f"Cannot find any {device_type}")
-                continue
-            unique_id = SENSORS[device_type]["unique_id"]
-            sensors = SENSORS[device_type]["sensors"]
-            for index, sensor_data in enumerate(sunpower_data[device_type].values()):
-                for sensor_name in sensors:
-                    sensor = sensors[sensor_name]
-                    sensor_type = (
-                        "" if not do_descriptive_names else f"{sensor_data.get('TYPE', '')} "
-                    )
-                    sensor_description = (
-                        "" if not do_descriptive_names else f"{sensor_data.get('DESCR', '')} "
-                    )
-                    text_sunpower = "" if not do_product_names else "SunPower "
-                    text_sunvault = "" if not do_product_names else "SunVault "
-                    text_pvs = "" if not do_product_names else "PVS "
-                    sensor_index = "" if not do_descriptive_names else f"{index + 1} "
-                    sunpower_sensor = SunPowerSensor(
-                        coordinator=coordinator,
-                        my_info=sensor_data,
-                        parent_info=pvs if device_type != PVS_DEVICE_TYPE else None,
-                        id_code=unique_id,
-                        device_type=device_type,
-                        field=sensor["field"],
-                        title=sensor["title"].format(
-                            index=sensor_index,
-                            TYPE=sensor_type,
-                            DESCR=sensor_description,
-                            SUN_POWER=text_sunpower,
-                            SUN_VAULT=text_sunvault,
-                            PVS=text_pvs,
-                            SERIAL=sensor_data.get("SERIAL", "Unknown"),
-                            MODEL=sensor_data.get("MODEL", "Unknown"),
-                        ),
-                        unit=sensor["unit"],
-                        icon=sensor["icon"],
-                        device_class=sensor["device"],
-                        state_class=sensor["state"],
-                        entity_category=sensor.get("entity_category", None),
-                    )
-                    if sunpower_sensor.native_value is not None:
-                        entities.append(sunpower_sensor)
-
-    async_add_entities(entities, True)
+
+    @callback
+    def async_add_sunpower_entities():
+        async_add_data_entities(config_entry, coordinator, create_sensors, async_add_entities)
+
+    async_when_data_ready(sunpower_state, coordinator, async_add_sunpower_entities)
+
+
+@dataclass(frozen=True, slots=True)
+class SunPowerSensorDescription(SunPowerEntityDescription):
+    """A sensor table entry with the sensor specifics and its write throttling"""
+
+    unit: str | None = None
+    icon: str | None = None
+    device_class: SensorDeviceClass | None = None
+    state_class: SensorStateClass | None = None
+    enabled_default: bool = True
+    deadband: float = 0.0
+    relative_deadband: float = 0.0
+    min_interval: int = 0
+    scale: float = 1.0
+
+
+def describe_sensor(key, device_type, id_code, sensor):
+    return SunPowerSensorDescription(
+        key=key,
+        device_type=device_type,
+        id_code=id_code,
+        field=sensor["field"],
+        title=sensor["title"],
+        entity_category=sensor.get("entity_category", None),
+        unit=sensor["unit"],
+        icon=sensor["icon"],
+        device_class=sensor["device"],
+        state_class=sensor["state"],
+        enabled_default=sensor.get("enabled", True),
+        deadband=sensor.get("deadband", 0.0),
+        relative_deadband=sensor.get("relative_deadband", 0.0),
+        min_interval=sensor.get("min_interval", 0),
+        # The PVS reports power factor as a ratio
+        scale=100.0 if sensor["device"] == SensorDeviceClass.POWER_FACTOR else 1.0,
+    )
+
+
+SENSOR_DESCRIPTIONS = compile_descriptions(SUNPOWER_SENSORS, describe_sensor)
+SUNVAULT_SENSOR_DESCRIPTIONS = compile_descriptions(SUNVAULT_SENSORS, describe_sensor)
+
+
+def create_throttle(description, min_write_interval=0):
+    """Write throttle for a sensor, None if its writes are never held back.
+    A min_write_interval (from the options) replaces the min_interval of the description"""
+    if description.state_class in (SensorStateClass.TOTAL, SensorStateClass.TOTAL_INCREASING):
+        return None  # energy and counters must stay exact
+    min_interval = min_write_interval or description.min_interval
+    if not (description.deadband or description.relative_deadband or min_interval):
+        return None
+    return SunPowerWriteThrottle(
+        description.deadband,
+        description.relative_deadband,
+        min_interval,
+    )
+
+
+def create_sensors(config_entry, coordinator):
+    """Create the sensors for the devices in the coordinator data"""
+    throttle_writes = config_entry.options.get(SUNPOWER_THROTTLE_WRITES, True)
+    min_write_interval = config_entry.options.get(
+        SUNPOWER_MIN_WRITE_INTERVAL,
+        DEFAULT_SUNPOWER_MIN_WRITE_INTERVAL,
+    )
+    return [
+        SunPowerSensor(
+            coordinator,
+            description,
+            device,
+            device_info,
+            title,
+            throttle=create_throttle(description, min_write_interval) if throttle_writes else None,
+        )
+        for description, device, device_info, title in entity_targets(
+            config_entry,
+            coordinator,
+            SENSOR_DESCRIPTIONS,
+            SUNVAULT_SENSOR_DESCRIPTIONS,
+        )
+        if description.field in device
+    ]
 
 
 class SunPowerSensor(SunPowerEntity, SensorEntity):
-    def __init__(
-        self,
-        coordinator,
-        my_info,
-        parent_info,
-        id_code,
-        device_type,
-        field,
-        title,
-        unit,
-        icon,
-        device_class,
-        state_class,
-        entity_category,
-    ):
+    def __init__(self, coordinator, description, my_info, device_info, title, throttle=None):
         """Initialize the sensor."""
-        super().__init__(coordinator, my_info, parent_info)
-        self._id_code = id_code
-        self._device_type = device_type
-        self._title = title
-        self._field = field
-        self._unit = unit
-        self._icon = icon
-        self._my_device_class = device_class
-        self._my_state_class = state_class
-        self._entity_category = entity_category
+        super().__init__(coordinator, description, my_info, device_info, title)
+        self._throttle = throttle
+
+    def _bind_value(self, record):
+        value = None if record is None else record.get(self._field)
+        if value is not None and self._description.scale != 1.0:
+            value *= self._description.scale
+        self._attr_native_value = value
+
+    def _value_changed(self):
+        """Hold back writes the throttle considers too small or too soon, unless every entity
+        has to write (changed is None) since the stale attributes might have changed"""
+        if self._throttle is None or self.coordinator.changed is None:
+            return super()._value_changed()
+        if not (self._throttle.pending or super()._value_changed()):
+            return False
+        return self._throttle.allow(self.native_value, time.monotonic())
+
+    @callback
+    def async_write_ha_state(self):
+        """Write the state, remembering what was written for the throttle"""
+        if self._throttle is not None:
+            self._throttle.written(self.native_value, time.monotonic())
+        super().async_write_ha_state()
 
     @property
     def native_unit_of_measurement(self):
         """Return the unit of measurement."""
-        return self._unit
+        return self._description.unit
 
     @property
     def device_class(self):
         """Return device class."""
-        return self._my_device_class
+        return self._description.device_class
 
     @property
-    def entity_category(self):
-        return self._entity_category
+    def entity_registry_enabled_default(self):
+        """Return if the entity should be enabled when first added"""
+        return self._description.enabled_default
 
     @property
     def state_class(self):
         """Return state class."""
-        return self._my_state_class
+        return self._description.state_class
 
     @property
     def icon(self):
         """Icon to use in the frontend, if any."""
-        return self._icon
-
-    @property
-    def name(self):
-        """Device Name."""
-        return self._title
-
-    @property
-    def unique_id(self):
-        """Device Uniqueid.
-        https://developers.home-assistant.io/docs/entity_registry_index/#unique-id
-        Should not include the domain, home assistant does that for us
-        base_unique_id is the serial number of the device (Inverter, PVS, Meter etc)
-        "_pvs_" just as a divider - in case we start pulling data from some other source
-        _field is the field within the data that this came from which is a dict so there
-        is only one.
-        Updating this format is a breaking change and should be called out if changed in a PR
-        """
-        return f"{self.base_unique_id}_pvs_{self._field}"
-
-    @property
-    def native_value(self):
-        """Get the current value"""
-        if self._my_device_class == SensorDeviceClass.POWER_FACTOR:
-            try:
-                value = float(
-                    self.coordinator.data[self._device_type][self.base_unique_id][self._field],
-                )
-                return value * 100.0
-            except (ValueError, KeyError):
-                pass  # sometimes this value might be something like 'unavailable'
-        return self.coordinator.data[self._device_type][self.base_unique_id].get(self._field, None)
+        return self._description.icon
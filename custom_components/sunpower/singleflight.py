@@ -0,0 +1,53 @@
+"""Coalescing of concurrent requests to the same PVS."""
+
+import asyncio
+import time
+
+
+class SunPowerSingleFlight:
+    """Let concurrent callers asking a monitor for the same thing share one request.
+    Callers joining a request in flight get its result or exception, a caller cancelled
+    while waiting leaves the request running for the others and for the next caller.  A
+    result can be kept for ttl seconds to answer callers that come right after it"""
+
+    def __init__(self):
+        """Initialize."""
+        self._in_flight = {}
+        self._results = {}
+        # Wall clock time the last request for each key was sent
+        self.started = {}
+        self.requests = 0
+        self.shared = 0
+        self.cached = 0
+
+    async def run(self, key, fetch, ttl=0):
+        """Result of fetch() for key, from a request in flight or one that ended less than
+        ttl seconds ago when there is one"""
+        result = self._results.get(key)
+        if result is not None:
+            if time.monotonic() < result[0]:
+                self.cached += 1
+                return result[1]
+            del self._results[key]
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.requests += 1
+            self.started[key] = time.time()
+            task = self._in_flight[key] = asyncio.ensure_future(fetch())
+            task.add_done_callback(lambda task: self._done(key, task, ttl))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task, ttl):
+        del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            return  # retrieved so a request nobody waits for any more does not log it
+        if ttl:
+            self._results[key] = (time.monotonic() + ttl, task.result())
+
+    @property
+    def stats(self):
+        """Requests sent, callers that joined one in flight and answered from a kept result"""
+        return {"requests": self.requests, "shared": self.shared, "cached": self.cached}
@@ -1,7 +1,40 @@
 """ Basic Sunpower PVS Tool """
 
+import asyncio
+import json
+import time
+
+import aiohttp
 import requests
-import simplejson
+
+from .breaker import (
+    BREAKER_CLOSED,
+    SunPowerCircuitBreaker,
+)
+from .singleflight import SunPowerSingleFlight
+
+try:
+    import orjson
+except ImportError:  # orjson ships with Home Assistant, the stdlib decoder is the fallback
+    orjson = None
+
+# A PVS on the LAN accepts a connection right away, one that does not is unreachable
+PVS_CONNECT_TIMEOUT = 10
+# The PVS system can take a very long time to respond so the read timeout is at 2 minutes
+PVS_READ_TIMEOUT = 120
+# The PVS CGI handles one request at a time, a couple of pooled connections is plenty
+PVS_POOL_SIZE = 2
+# Keep idle connections around longer than the usual poll interval so they get reused
+PVS_KEEPALIVE_TIMEOUT = 300
+# Name of the ESS status request in request_stats, the others go by their Command
+ESS_STATUS_COMMAND = "energy-storage-system/status"
+# Stop asking a PVS that failed this many requests in a row (rebooting or wedged) for a
+# while instead of waiting out the timeouts on every poll, then probe it with Get_Comm
+PVS_BREAKER_FAILURES = 3
+PVS_BREAKER_COOLDOWN = 300
+# Seconds a response is kept to answer the same command asked right after, the interface
+# list barely changes and is asked for by the breaker probe and the config flow
+PVS_RESULT_TTL = {"Get_Comm": 10}
 
 
 class ConnectionException(Exception):
@@ -12,26 +45,90 @@ class ParseException(Exception):
     """Any failure to connect to sunpower PVS"""
 
 
+class CircuitOpenException(ConnectionException):
+    """Request not sent, the PVS failed too often lately"""
+
+
+class TimeoutException(ConnectionException):
+    """The PVS did not answer in time, the message tells which phase timed out"""
+
+
+# Which decoder decode_json uses, for the benchmark
+JSON_DECODER = "orjson" if orjson is not None else "json"
+
+
+def decode_json(body):
+    """Decode a raw (bytes) response body, raising ParseException when it is not JSON"""
+    try:
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+    except ValueError as error:  # the JSONDecodeErrors of both and UnicodeDecodeError
+        raise ParseException from error
+
+
 class SunPowerMonitor:
     """Basic Class to talk to sunpower pvs 5/6 via the management interface 'API'.
     This is not a public API so it might fail at any time.
     if you find this useful please complain to sunpower and your sunpower dealer that they
     do not have a public API"""
 
-    def __init__(self, host):
+    def __init__(
+        self,
+        host,
+        pool_size=PVS_POOL_SIZE,
+        connect_timeout=PVS_CONNECT_TIMEOUT,
+        read_timeout=PVS_READ_TIMEOUT,
+    ):
         """Initialize."""
         self.host = host
         self.command_url = "http://{0}/cgi-bin/dl_cgi?Command=".format(host)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True,
+        )
+        self._session = requests.Session()
+        self._session.mount("http://", self._adapter)
 
-    def generic_command(self, command):
-        """All 'commands' to the PVS module use this url pattern and return json
-        The PVS system can take a very long time to respond so timeout is at 2 minutes"""
+    @property
+    def connection_stats(self):
+        """Connections opened to the PVS versus requests that reused an open one"""
+        opened = 0
+        requests_made = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():  # the container refuses to iterate over its values
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            requests_made += pool.num_requests
+        return {"opened": opened, "reused": max(requests_made - opened, 0)}
+
+    def close(self):
+        """Close the pooled connections to the PVS"""
+        self._session.close()
+
+    def _get_json(self, url, name):
+        """Fetch url and decode the json body, mapping failures to our exceptions"""
         try:
-            return requests.get(self.command_url + command, timeout=120).json()
+            response = self._session.get(url, timeout=(self.connect_timeout, self.read_timeout))
+        except requests.exceptions.ConnectTimeout as error:
+            message = f"{name} connect timed out after {self.connect_timeout}s"
+            raise TimeoutException(message) from error
+        except requests.exceptions.ReadTimeout as error:
+            message = f"{name} read timed out after {self.read_timeout}s"
+            raise TimeoutException(message) from error
         except requests.exceptions.RequestException as error:
             raise ConnectionException from error
-        except simplejson.errors.JSONDecodeError as error:
-            raise ParseException from error
+        return decode_json(response.content)
+
+    def generic_command(self, command):
+        """All 'commands' to the PVS module use this url pattern and return json
+        The PVS system can take a very long time to respond so read_timeout is at 2 minutes"""
+        return self._get_json(self.command_url + command, command)
 
     def device_list(self):
         """Get a list of all devices connected to the PVS"""
@@ -39,16 +136,207 @@ class SunPowerMonitor:
 
     def energy_storage_system_status(self):
         """Get the status of the energy storage system"""
-        try:
-            return requests.get(
-                "http://{0}/cgi-bin/dl_cgi/energy-storage-system/status".format(self.host),
-                timeout=120,
-            ).json()
-        except requests.exceptions.RequestException as error:
-            raise ConnectionException from error
-        except simplejson.errors.JSONDecodeError as error:
-            raise ParseException from error
+        return self._get_json(
+            "http://{0}/cgi-bin/dl_cgi/energy-storage-system/status".format(self.host),
+            ESS_STATUS_COMMAND,
+        )
 
     def network_status(self):
         """Get a list of network interfaces on the PVS"""
         return self.generic_command("Get_Comm")
+
+
+class AsyncSunPowerMonitor:
+    """Asyncio version of SunPowerMonitor, same commands and exceptions.
+    Requests run on the event loop through an aiohttp session so a slow PVS does not hold an
+    executor thread"""
+
+    def __init__(
+        self,
+        host,
+        session=None,
+        pool_size=PVS_POOL_SIZE,
+        connect_timeout=PVS_CONNECT_TIMEOUT,
+        read_timeout=PVS_READ_TIMEOUT,
+        result_ttl=PVS_RESULT_TTL,
+    ):
+        """Initialize, without a session the monitor opens its own keep-alive one which must
+        be released with close()"""
+        self.host = host
+        self.command_url = "http://{0}/cgi-bin/dl_cgi?Command=".format(host)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.result_ttl = result_ttl
+        self.single_flight = SunPowerSingleFlight()
+        # Separate timeouts so an unreachable PVS fails in seconds while a slow DeviceList
+        # still gets minutes
+        self._timeout = aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=connect_timeout,
+            sock_read=read_timeout,
+        )
+        self.ess_url = "http://{0}/cgi-bin/dl_cgi/energy-storage-system/status".format(host)
+        self._session = session
+        self._owns_session = session is None
+        self._closed = False
+        self._pool_size = pool_size
+        self._connections_opened = 0
+        self._connections_reused = 0
+        # Timings (ms) and size of the last response of every command
+        self.request_stats = {}
+        self.breaker = SunPowerCircuitBreaker(PVS_BREAKER_FAILURES, PVS_BREAKER_COOLDOWN)
+
+    @property
+    def connection_stats(self):
+        """Connections opened to the PVS versus requests that reused an open one"""
+        return {"opened": self._connections_opened, "reused": self._connections_reused}
+
+    async def _on_connection_create_start(self, session, trace_config_ctx, params):
+        if trace_config_ctx.trace_request_ctx is not None:
+            trace_config_ctx.trace_request_ctx["connect_start"] = time.monotonic()
+
+    async def _on_connection_create_end(self, session, trace_config_ctx, params):
+        self._connections_opened += 1
+        timings = trace_config_ctx.trace_request_ctx
+        if timings is not None and "connect_start" in timings:
+            timings["connect"] = time.monotonic() - timings["connect_start"]
+
+    async def _on_connection_reuseconn(self, session, trace_config_ctx, params):
+        self._connections_reused += 1
+        if trace_config_ctx.trace_request_ctx is not None:
+            trace_config_ctx.trace_request_ctx["connect"] = 0.0
+
+    def _get_session(self):
+        """Return the session, creating our own pooled one on first use.  Requests still
+        going when the monitor was closed must not open a session nobody closes"""
+        if self._closed:
+            raise ConnectionException(f"Monitor of {self.host} is closed")
+        if self._session is None:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_start.append(self._on_connection_create_start)
+            trace_config.on_connection_create_end.append(self._on_connection_create_end)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._pool_size,
+                    limit_per_host=self._pool_size,
+                    keepalive_timeout=PVS_KEEPALIVE_TIMEOUT,
+                ),
+                trace_configs=[trace_config],
+            )
+        return self._session
+
+    async def close(self):
+        """Close the session if we own it, the monitor sends no more requests"""
+        self._closed = True
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _check_breaker(self):
+        """Fail fast with CircuitOpenException while the breaker is open, once it cooled
+        down probe the PVS with a cheap Get_Comm before letting the request through"""
+        if self.breaker.state == BREAKER_CLOSED:
+            return
+        if not self.breaker.try_probe(time.monotonic()):
+            raise CircuitOpenException(f"{self.host} failed {self.breaker.failures} times")
+        try:
+            await self.single_flight.run(
+                "Get_Comm",
+                lambda: self._request_json(self.command_url + "Get_Comm", "Get_Comm"),
+                self.result_ttl.get("Get_Comm", 0),
+            )
+        except ConnectionException:
+            self.breaker.failure(time.monotonic())
+            raise
+        except ParseException:
+            pass  # it answered, good enough
+        self.breaker.success()
+
+    async def _get_json(self, url, name, trips=True):
+        """Fetch url for name, joining a request for name already in flight instead of
+        queueing another on the PVS.  The commands in result_ttl are answered from their last
+        response for that long, a network_status right after a breaker probe gets its answer"""
+        await self._check_breaker()
+        return await self.single_flight.run(
+            name,
+            lambda: self._fetch_json(url, name, trips),
+            self.result_ttl.get(name, 0),
+        )
+
+    async def _fetch_json(self, url, name, trips):
+        """Fetch url reporting to the circuit breaker when trips, requests that don't trip it
+        don't close it either"""
+        try:
+            result = await self._request_json(url, name)
+        except ConnectionException:
+            if trips:
+                self.breaker.failure(time.monotonic())
+            raise
+        if trips:
+            self.breaker.success()
+        return result
+
+    def request_started(self, name):
+        """When the request that gave the last result for name was sent, earlier than asked
+        for when joining one in flight"""
+        return self.single_flight.started.get(name)
+
+    def _timeout_message(self, name, timings):
+        """Which phase of the request timed out, only our own session traces whether the
+        connection was made"""
+        if not self._owns_session:
+            return f"{name} timed out"
+        if "connect" in timings:
+            return f"{name} read timed out after {self.read_timeout}s"
+        return f"{name} connect timed out after {self.connect_timeout}s"
+
+    async def _request_json(self, url, name):
+        """Fetch url and decode the json body, mapping failures to our exceptions.
+        The stages of the request are timed into request_stats[name], connect_time is only
+        measured on our own session"""
+        timings = {}
+        try:
+            start = time.monotonic()
+            async with self._get_session().get(
+                url,
+                timeout=self._timeout,
+                trace_request_ctx=timings,
+            ) as response:
+                headers = time.monotonic()
+                body = await response.read()
+            downloaded = time.monotonic()
+        except asyncio.TimeoutError as error:  # aiohttp's timeouts are ClientErrors too
+            raise TimeoutException(self._timeout_message(name, timings)) from error
+        except aiohttp.ClientError as error:
+            raise ConnectionException from error
+        result = decode_json(body)
+        decoded = time.monotonic()
+
+        connect = timings.get("connect", 0.0)
+        self.request_stats[name] = {
+            "request_time": (decoded - start) * 1000,
+            "connect_time": connect * 1000,
+            "ttfb": (headers - start - connect) * 1000,
+            "download_time": (downloaded - headers) * 1000,
+            "decode_time": (decoded - downloaded) * 1000,
+            "bytes": len(body),
+        }
+        return result
+
+    async def generic_command(self, command):
+        """All 'commands' to the PVS module use this url pattern and return json"""
+        return await self._get_json(self.command_url + command, command)
+
+    async def device_list(self):
+        """Get a list of all devices connected to the PVS"""
+        return await self.generic_command("DeviceList")
+
+    async def energy_storage_system_status(self):
+        """Get the status of the energy storage system, its failures don't open the breaker
+        since the PVS keeps answering commands when just the ESS is down"""
+        return await self._get_json(self.ess_url, ESS_STATUS_COMMAND, trips=False)
+
+    async def network_status(self):
+        """Get a list of network interfaces on the PVS"""
+        return await self.generic_command("Get_Comm")
@@ -0,0 +1,37 @@
+"""Write throttling for noisy sunpower sensors."""
+
+
+class SunPowerWriteThrottle:
+    """Decide if a sensor value is worth a state write.
+    A change is skipped while it is within deadband (absolute, in the sensor unit) or
+    relative_deadband (share of the last written value) of the last written value, and
+    no value is written sooner than min_interval seconds after the previous write.  A
+    change held back by min_interval stays pending until it can be written"""
+
+    def __init__(self, deadband=0.0, relative_deadband=0.0, min_interval=0):
+        """Initialize."""
+        self.deadband = deadband
+        self.relative_deadband = relative_deadband
+        self.min_interval = min_interval
+        self.pending = False
+        self._value = None
+        self._written_at = None
+
+    def allow(self, value, now):
+        """If value should be written now"""
+        if value is None or self._value is None or self._written_at is None:
+            return True
+        if now - self._written_at < self.min_interval:
+            self.pending = value != self._value
+            return False
+        delta = abs(value - self._value)
+        if delta <= self.deadband or delta <= abs(self._value) * self.relative_deadband:
+            self.pending = False
+            return False
+        return True
+
+    def written(self, value, now):
+        """Record a state write of value"""
+        self._value = value
+        self._written_at = now
+        self.pending = False
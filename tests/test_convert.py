@@ -0,0 +1,36 @@
+"""Tests of the PVS payload conversion."""
+
+import pytest
+
+from custom_components.sunpower.convert import to_number
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("12", 12),
+        ("12.0", 12.0),
+        ("-0.5", -0.5),
+        (7, 7),
+        (2.5, 2.5),
+        ("unavailable", None),
+        (None, None),
+    ],
+)
+def test_to_number(value, expected):
+    number = to_number(value)
+    assert number == expected
+    assert type(number) is type(expected)
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["nan", "NaN", "inf", "-Infinity", float("nan"), float("inf"), float("-inf")],
+)
+def test_to_number_not_finite(value):
+    assert to_number(value) is None
+
+
+@pytest.mark.parametrize("value", [True, False])
+def test_to_number_bool(value):
+    assert to_number(value) is None
@@ -0,0 +1,53 @@
+"""Tests of the PVS clients."""
+
+import json
+import threading
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+
+import pytest
+
+from custom_components.sunpower.sunpower import SunPowerMonitor
+
+
+class PVSRequestHandler(BaseHTTPRequestHandler):
+    """Answer every request with an empty device list on a kept-alive connection"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"devices": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+@pytest.fixture()
+def pvs_host():
+    """Address of a local PVS stand-in"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PVSRequestHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_connection_stats_after_requests(pvs_host):
+    monitor = SunPowerMonitor(pvs_host)
+    try:
+        assert monitor.connection_stats == {"opened": 0, "reused": 0}
+        assert monitor.device_list() == {"devices": []}
+        assert monitor.connection_stats == {"opened": 1, "reused": 0}
+        monitor.device_list()
+        assert monitor.connection_stats == {"opened": 1, "reused": 1}
+    finally:
+        monitor.close()
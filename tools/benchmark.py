@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Benchmarks for the PVS data conversion pipeline at fleet scale.
+
+Times the JSON decode of the DeviceList and ESS status bodies, convert_sunpower_data,
+create_vmeter, convert_ess_data and the whole sunpower_fetch (with the PVS replaced by
+canned payloads) on synthetic sites built from samples/device_list.json and records the
+peak memory allocated by each stage.  Decoding uses orjson when it is installed.  The entity
+stages build every sensor and binary sensor of the site and read their static and current
+attributes the way Home Assistant does on each state write.  Results are written as JSON,
+pass a previous run as --baseline to fail on regressions:
+
+    python tools/benchmark.py --output bench.json
+    python tools/benchmark.py --baseline bench.json
+
+Needs Home Assistant installed since the integration modules import it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from synthetic import (  # noqa: E402
+    SAMPLE_PATH,
+    load_sample,
+    synthesize_device_list,
+    synthesize_ess_status,
+)
+
+from custom_components.sunpower.binary_sensor import create_binary_sensors  # noqa: E402
+from custom_components.sunpower.cache import SunPowerSampleCache  # noqa: E402
+from custom_components.sunpower.const import (  # noqa: E402
+    ESS_ENDPOINT,
+    PVS_ENDPOINT,
+    SUNPOWER_DESCRIPTIVE_NAMES,
+)
+from custom_components.sunpower.convert import (  # noqa: E402
+    convert_ess_data,
+    convert_sunpower_data,
+    create_vmeter,
+)
+from custom_components.sunpower.coordinator import sunpower_fetch  # noqa: E402
+from custom_components.sunpower.sensor import (  # noqa: E402
+    SunPowerSensor,
+    create_sensors,
+)
+from custom_components.sunpower.sunpower import (  # noqa: E402
+    JSON_DECODER,
+    decode_json,
+)
+
+DEFAULT_DEVICES = (10, 100, 500, 2000)
+DEFAULT_BATTERIES = (0, 1, 4, 8)
+
+
+class FakeMonitor:
+    """Stands in for AsyncSunPowerMonitor, answering instantly with canned payloads"""
+
+    def __init__(self, device_list, ess_status):
+        """Initialize."""
+        self._device_list = device_list
+        self._ess_status = ess_status
+
+    async def device_list(self):
+        return self._device_list
+
+    async def energy_storage_system_status(self):
+        return self._ess_status
+
+    async def network_status(self):
+        return {"result": "succeed"}
+
+    def request_started(self, name):
+        return None
+
+
+class FakeCoordinator:
+    """Just enough of SunPowerDataUpdateCoordinator for entities to be built and read"""
+
+    def __init__(self, data):
+        """Initialize."""
+        self.data = data
+        self.changed = None
+        self.stale = False
+        self.last_update_success = True
+
+    def endpoint_stale(self, endpoint):
+        return False
+
+    def endpoint_expired(self, endpoint):
+        return False
+
+    def data_age(self, endpoint):
+        return 0.0
+
+
+def create_entities(coordinator):
+    entry = SimpleNamespace(data={SUNPOWER_DESCRIPTIVE_NAMES: True}, options={})
+    return create_sensors(entry, coordinator) + create_binary_sensors(entry, coordinator)
+
+
+def read_entities(entities):
+    """Read what a state write looks at, leaving out Home Assistant's own formatting"""
+    for entity in entities:
+        entity.unique_id
+        entity.device_info
+        entity.name
+        entity.available
+        entity.extra_state_attributes
+        if isinstance(entity, SunPowerSensor):
+            entity.native_value
+        else:
+            entity.is_on
+
+
+def measure(function, repeat, number):
+    """Time function, returning best and median milliseconds per call and peak KiB"""
+    function()  # warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) * 1000 / number)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "best_ms": round(min(timings), 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def stages(device_list, ess_status, loop):
+    """The benchmarked stages for one site as (name, callable)"""
+    has_ess = bool(ess_status["ess_report"]["battery_status"])
+    converted = convert_sunpower_data(device_list)
+    monitor = FakeMonitor(device_list, ess_status)
+
+    def fetch():
+        endpoints = {PVS_ENDPOINT, ESS_ENDPOINT} if has_ess else {PVS_ENDPOINT}
+        return loop.run_until_complete(
+            sunpower_fetch(monitor, SunPowerSampleCache(), endpoints),
+        )
+
+    device_list_body = json.dumps(device_list).encode()
+    ess_status_body = json.dumps(ess_status).encode()
+
+    yield "decode_device_list", lambda: decode_json(device_list_body)
+    if has_ess:
+        yield "decode_ess_status", lambda: decode_json(ess_status_body)
+    yield "convert_sunpower_data", lambda: convert_sunpower_data(device_list)
+    yield "create_vmeter", lambda: create_vmeter(converted)
+    if has_ess:
+        yield "convert_ess_data", lambda: convert_ess_data(ess_status, converted)
+    yield "sunpower_fetch", fetch
+
+    if has_ess:
+        convert_ess_data(ess_status, converted)
+    coordinator = FakeCoordinator(converted)
+    entities = create_entities(coordinator)
+    yield "create_entities", lambda: create_entities(coordinator)
+    yield "read_entities", lambda: read_entities(entities)
+
+
+def run(args):
+    sample = load_sample(args.sample)
+    loop = asyncio.new_event_loop()
+    results = []
+    for devices in args.devices:
+        for batteries in args.batteries:
+            device_list = synthesize_device_list(sample, inverters=devices, batteries=batteries)
+            ess_status = synthesize_ess_status(device_list)
+            for stage, function in stages(device_list, ess_status, loop):
+                result = {"devices": devices, "batteries": batteries, "stage": stage}
+                result.update(measure(function, args.repeat, args.number))
+                results.append(result)
+                print(
+                    f"{devices:>5} devices {batteries} batteries {stage:<22}"
+                    f" {result['best_ms']:>10.3f} ms {result['peak_kib']:>10.1f} KiB",
+                )
+    loop.close()
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """Stages that got slower than baseline by more than tolerance"""
+    previous = {(r["devices"], r["batteries"], r["stage"]): r for r in baseline["results"]}
+    slower = []
+    for result in results:
+        before = previous.get((result["devices"], result["batteries"], result["stage"]))
+        if before and result["best_ms"] > before["best_ms"] * (1 + tolerance):
+            slower.append((result, before))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sample", default=SAMPLE_PATH, help="DeviceList to build sites from")
+    parser.add_argument("--devices", type=int, nargs="+", default=DEFAULT_DEVICES)
+    parser.add_argument("--batteries", type=int, nargs="+", default=DEFAULT_BATTERIES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown")
+    args = parser.parse_args(argv)
+
+    print(f"Decoding JSON with {JSON_DECODER}")
+    results = run(args)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "json": JSON_DECODER,
+                "timestamp": int(time.time()),
+                "results": results,
+            },
+            output,
+            indent=2,
+        )
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            slower = regressions(results, json.load(baseline_file), args.tolerance)
+        for result, before in slower:
+            print(
+                f"REGRESSION {result['devices']} devices {result['batteries']} batteries"
+                f" {result['stage']}: {before['best_ms']} ms -> {result['best_ms']} ms",
+            )
+        if slower:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
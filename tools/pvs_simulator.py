@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Local stand-in for a PVS management interface.
+
+Serves DeviceList, Get_Comm and the ESS status endpoint for a synthetic site built from
+samples/device_list.json and can inject latency, hung requests, malformed JSON and device
+state flaps.  Point the integration (or SunPowerMonitor) at it to benchmark or load test
+without a PVS, e.g. a 200 panel site with two SunVaults:
+
+    python tools/pvs_simulator.py --inverters 200 --batteries 4 --latency 30
+
+then configure the integration with host 127.0.0.1:8080
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+from urllib.parse import (
+    parse_qs,
+    urlparse,
+)
+
+from synthetic import (
+    SAMPLE_PATH,
+    accumulate_energy,
+    load_sample,
+    synthesize_device_list,
+    synthesize_ess_status,
+    synthesize_network_status,
+)
+
+_LOGGER = logging.getLogger("pvs_simulator")
+
+CGI_PATH = "/cgi-bin/dl_cgi"
+ESS_PATH = "/cgi-bin/dl_cgi/energy-storage-system/status"
+
+
+class PVSSimulator:
+    """Builds responses for the simulated site and decides which faults to inject"""
+
+    def __init__(self, args):
+        """Initialize."""
+        self.args = args
+        self.sample = load_sample(args.sample)
+        self.rng = random.Random(args.seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+        # Lifetime kWh per inverter, only ever growing so Home Assistant sees no meter resets
+        self.energy = {}
+        self.energy_time = None
+        # The real PVS CGI answers one request at a time
+        self.serialize = threading.Lock() if args.serialize else None
+
+    def device_list(self, poll):
+        device_list = synthesize_device_list(
+            self.sample,
+            inverters=self.args.inverters,
+            meters=self.args.meters,
+            batteries=self.args.batteries,
+            seed=self.args.seed + poll,
+        )
+        if self.args.flap_rate:
+            for device in device_list["devices"]:
+                if self.rng.random() < self.args.flap_rate:
+                    device["STATE"] = "error" if device["STATE"] == "working" else "working"
+                    device["STATEDESCR"] = device["STATE"].title()
+        with self.lock:
+            now = time.monotonic()
+            hours = 0.0 if self.energy_time is None else (now - self.energy_time) / 3600
+            self.energy_time = now
+            accumulate_energy(device_list, self.energy, hours)
+        return device_list
+
+    def respond(self, path, query):
+        """Return (status, body) for a request"""
+        with self.lock:
+            self.requests += 1
+            poll = self.requests
+        if path == ESS_PATH:
+            device_list = synthesize_device_list(
+                self.sample,
+                inverters=0,
+                meters=0,
+                batteries=self.args.batteries,
+            )
+            return 200, synthesize_ess_status(device_list, seed=self.args.seed + poll)
+        if path == CGI_PATH:
+            command = query.get("Command", [""])[0]
+            if command == "DeviceList":
+                return 200, self.device_list(poll)
+            if command == "Get_Comm":
+                return 200, synthesize_network_status()
+        return 404, {"result": "unknown command"}
+
+
+class PVSRequestHandler(BaseHTTPRequestHandler):
+    """Answers like the PVS dl_cgi, including its faults"""
+
+    protocol_version = "HTTP/1.1"
+    simulator = None
+
+    def do_GET(self):
+        simulator = self.simulator
+        args = simulator.args
+        url = urlparse(self.path)
+
+        if simulator.rng.random() < args.timeout_rate:
+            _LOGGER.info("%s: hanging for %ss", self.path, args.hang)
+            time.sleep(args.hang)
+            self.close_connection = True
+            return
+
+        if simulator.serialize is not None:
+            simulator.serialize.acquire()
+        try:
+            time.sleep(max(0.0, args.latency + simulator.rng.uniform(-args.jitter, args.jitter)))
+            status, payload = simulator.respond(url.path, parse_qs(url.query))
+        finally:
+            if simulator.serialize is not None:
+                simulator.serialize.release()
+
+        body = json.dumps(payload).encode()
+        if simulator.rng.random() < args.malformed_rate:
+            _LOGGER.info("%s: sending malformed JSON", self.path)
+            body = body[: len(body) // 2]
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        _LOGGER.debug("%s %s", self.address_string(), format % args)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--sample", default=SAMPLE_PATH, help="DeviceList to clone devices from")
+    parser.add_argument("--inverters", type=int, default=20)
+    parser.add_argument("--meters", type=int, default=2)
+    parser.add_argument("--batteries", type=int, default=0, help="ESS BMS units, 0 for no ESS")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+- seconds of latency")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="share of hung requests")
+    parser.add_argument("--hang", type=float, default=130.0, help="seconds a hung request lasts")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of bad JSON")
+    parser.add_argument("--flap-rate", type=float, default=0.0, help="share of flipped STATEs")
+    parser.add_argument(
+        "--serialize",
+        action="store_true",
+        help="answer one request at a time like the real PVS",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    PVSRequestHandler.simulator = PVSSimulator(args)
+    server = ThreadingHTTPServer((args.host, args.port), PVSRequestHandler)
+    _LOGGER.info(
+        "Simulating a PVS with %s inverters, %s meters and %s batteries on %s:%s",
+        args.inverters,
+        args.meters,
+        args.batteries,
+        args.host,
+        args.port,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
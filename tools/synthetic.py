@@ -0,0 +1,232 @@
+"""Synthetic PVS payloads built from the captured samples/device_list.json.
+
+Used by the PVS simulator and the benchmarks to stand in for sites of any size.  This only
+uses the standard library so it runs without Home Assistant installed, the device type names
+below mirror the ones in custom_components/sunpower/const.py.
+"""
+
+import copy
+import json
+import os
+import random
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), "..", "samples", "device_list.json")
+
+PVS_DEVICE_TYPE = "PVS"
+INVERTER_DEVICE_TYPE = "Inverter"
+METER_DEVICE_TYPE = "Power Meter"
+BATTERY_DEVICE_TYPE = "ESS BMS"
+ESS_DEVICE_TYPE = "Energy Storage System"
+HUBPLUS_DEVICE_TYPE = "HUB+"
+
+# Numeric inverter fields and how much they wander between polls (relative)
+INVERTER_JITTER = {
+    "p_3phsum_kw": 0.2,
+    "p_mppt1_kw": 0.2,
+    "i_3phsum_a": 0.2,
+    "i_mppt1_a": 0.2,
+    "v_mppt1_v": 0.05,
+    "vln_3phavg_v": 0.01,
+    "freq_hz": 0.001,
+    "t_htsnk_degc": 0.05,
+}
+METER_JITTER = {
+    "p_3phsum_kw": 0.2,
+    "q_3phsum_kvar": 0.2,
+    "s_3phsum_kva": 0.2,
+    "i_a": 0.2,
+    "i1_a": 0.2,
+    "i2_a": 0.2,
+    "p1_kw": 0.2,
+    "p2_kw": 0.2,
+    "v12_v": 0.01,
+    "v1n_v": 0.01,
+    "v2n_v": 0.01,
+    "freq_hz": 0.001,
+}
+
+
+def load_sample(path=SAMPLE_PATH):
+    """Load a captured DeviceList response"""
+    with open(path, encoding="utf-8") as sample_file:
+        return json.load(sample_file)
+
+
+def _template(sample, device_type):
+    for device in sample["devices"]:
+        if device["DEVICE_TYPE"] == device_type:
+            return device
+    raise ValueError(f"No {device_type} in sample")
+
+
+def _jitter(device, fields, rng):
+    for field, spread in fields.items():
+        if field in device:
+            try:
+                value = float(device[field])
+            except ValueError:
+                continue
+            device[field] = f"{value * (1 + rng.uniform(-spread, spread)):.4f}"
+
+
+def synthesize_device_list(sample, inverters=20, meters=2, batteries=0, seed=0):
+    """Build a DeviceList response with the requested number of devices.
+    Inverters and meters are cloned from the first of their kind in the sample with new
+    serials and jittered readings.  With batteries > 0 an ESS and HUB+ are added, one ESS
+    per two batteries like a SunVault"""
+    rng = random.Random(seed)
+    pvs = copy.deepcopy(_template(sample, PVS_DEVICE_TYPE))
+    pvs_serial = pvs["SERIAL"]
+    devices = [pvs]
+
+    meter_templates = [d for d in sample["devices"] if d["DEVICE_TYPE"] == METER_DEVICE_TYPE]
+    for index in range(meters):
+        meter = copy.deepcopy(meter_templates[index % len(meter_templates)])
+        suffix = meter["SERIAL"][-1]
+        meter["SERIAL"] = f"{pvs_serial[:12]}{index:02d}{suffix}"
+        meter["DESCR"] = f"Power Meter {meter['SERIAL']}"
+        _jitter(meter, METER_JITTER, rng)
+        devices.append(meter)
+
+    inverter_template = _template(sample, INVERTER_DEVICE_TYPE)
+    for index in range(inverters):
+        inverter = copy.deepcopy(inverter_template)
+        inverter["SERIAL"] = f"E00{index:012d}"
+        inverter["DESCR"] = f"Inverter {inverter['SERIAL']}"
+        inverter["STATE"] = "working"
+        inverter["STATEDESCR"] = "Working"
+        inverter["ltea_3phsum_kwh"] = f"{rng.uniform(500, 3000):.4f}"
+        _jitter(inverter, INVERTER_JITTER, rng)
+        devices.append(inverter)
+
+    if batteries:
+        for index in range(batteries):
+            devices.append(_ess_device(BATTERY_DEVICE_TYPE, f"BC{index:010d}", "SPWR-BMS"))
+        for index in range((batteries + 1) // 2):
+            devices.append(_ess_device(ESS_DEVICE_TYPE, f"00001D{index:08d}", "SPWR-Equinox"))
+        devices.append(_ess_device(HUBPLUS_DEVICE_TYPE, "PVS6HUB00000001", "SPWR-HUBPLUS"))
+
+    return {"devices": devices, "result": "succeed"}
+
+
+def accumulate_energy(device_list, energy, hours):
+    """Make the lifetime energy of the inverters in device_list keep growing across polls.
+    energy holds the kWh per serial from the previous poll, each inverter adds its power
+    over the hours since then.  An inverter seen for the first time starts from the value
+    it was synthesized with"""
+    for device in device_list["devices"]:
+        if device["DEVICE_TYPE"] != INVERTER_DEVICE_TYPE:
+            continue
+        serial = device["SERIAL"]
+        if serial in energy:
+            energy[serial] += max(float(device["p_3phsum_kw"]), 0.0) * hours
+        else:
+            energy[serial] = float(device["ltea_3phsum_kwh"])
+        device["ltea_3phsum_kwh"] = f"{energy[serial]:.4f}"
+
+
+def _ess_device(device_type, serial, model):
+    return {
+        "ISDETAIL": True,
+        "SERIAL": serial,
+        "TYPE": model.upper(),
+        "STATE": "working",
+        "STATEDESCR": "Working",
+        "MODEL": model,
+        "DESCR": f"{device_type} {serial}",
+        "DEVICE_TYPE": device_type,
+        "SWVER": "1.0",
+        "HWVER": "1.0",
+        "origin": "data_logger",
+        "OPERATION": "noop",
+    }
+
+
+def _value(value, unit):
+    return {"value": round(value, 2), "unit": unit}
+
+
+def synthesize_ess_status(device_list, seed=0):
+    """Build an energy-storage-system/status response for the ESS devices in device_list"""
+    rng = random.Random(seed)
+    battery_status = []
+    ess_status = []
+    hub_plus_status = {}
+    for device in device_list["devices"]:
+        if device["DEVICE_TYPE"] == BATTERY_DEVICE_TYPE:
+            battery_status.append(
+                {
+                    "serial_number": device["SERIAL"],
+                    "battery_amperage": _value(rng.uniform(-20, 20), "A"),
+                    "battery_voltage": _value(rng.uniform(48, 56), "V"),
+                    "customer_state_of_charge": _value(rng.uniform(10, 100), "%"),
+                    "system_state_of_charge": _value(rng.uniform(10, 100), "%"),
+                    "temperature": _value(rng.uniform(15, 35), "C"),
+                },
+            )
+        elif device["DEVICE_TYPE"] == ESS_DEVICE_TYPE:
+            ess_status.append(
+                {
+                    "serial_number": device["SERIAL"],
+                    "enclosure_humidity": _value(rng.uniform(20, 60), "%"),
+                    "enclosure_temperature": _value(rng.uniform(15, 35), "C"),
+                    "ess_meter_reading": {
+                        "agg_power": _value(rng.uniform(-5, 5), "kW"),
+                        "meter_a": {"reading": _meter_reading(rng)},
+                        "meter_b": {"reading": _meter_reading(rng)},
+                    },
+                },
+            )
+        elif device["DEVICE_TYPE"] == HUBPLUS_DEVICE_TYPE:
+            hub_plus_status = {
+                "serial_number": device["SERIAL"],
+                "contactor_position": "CLOSED",
+                "grid_frequency_state": "METER_FREQ_IN_RANGE",
+                "grid_phase1_voltage": _value(rng.uniform(118, 122), "V"),
+                "grid_phase2_voltage": _value(rng.uniform(118, 122), "V"),
+                "grid_voltage_state": "METER_VOLTAGE_IN_RANGE",
+                "hub_humidity": _value(rng.uniform(20, 60), "%"),
+                "hub_temperature": _value(rng.uniform(15, 35), "C"),
+                "inverter_connection_voltage": _value(rng.uniform(238, 242), "V"),
+                "load_frequency_state": "METER_FREQ_IN_RANGE",
+                "load_phase1_voltage": _value(rng.uniform(118, 122), "V"),
+                "load_phase2_voltage": _value(rng.uniform(118, 122), "V"),
+                "main_voltage": _value(rng.uniform(238, 242), "V"),
+            }
+    return {
+        "ess_report": {
+            "battery_status": battery_status,
+            "ess_status": ess_status,
+            "hub_plus_status": hub_plus_status,
+        },
+    }
+
+
+def _meter_reading(rng):
+    return {
+        "current": _value(rng.uniform(0, 20), "A"),
+        "power": _value(rng.uniform(-2500, 2500), "W"),
+        "voltage": _value(rng.uniform(118, 122), "V"),
+    }
+
+
+def synthesize_network_status():
+    """A minimal Get_Comm response"""
+    return {
+        "networkstatus": {
+            "interfaces": [
+                {
+                    "interface": "sta0",
+                    "internet": "up",
+                    "ipaddr": "192.168.1.2",
+                    "link": "connected",
+                    "mode": "wan",
+                    "sms": "reachable",
+                    "state": "up",
+                },
+            ],
+            "system": {"interface": "sta0", "internet": "up", "sms": "reachable"},
+            "ts": "1713311171",
+        },
+        "result": "succeed",
+    }